@@ -1,10 +1,25 @@
 import os
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 from .config.config import config
 from .models.database import init_app as init_db_app
+from .utils.metrics import init_app as init_metrics_app
+from .utils.cache import init_app as init_cache_app
+from .utils.auth_decorators import init_app as init_auth_app
+from .utils.passwords import init_app as init_passwords_app
+from .utils.webhooks import init_app as init_webhooks_app
+from .utils.verification import init_app as init_verification_app
+from .utils.images import init_app as init_images_app
+from .utils.file_utils import init_app as init_uploads_app
+from .utils.assets import init_app as init_assets_app
+from .utils.compression import init_app as init_compression_app
+from .utils.catalog import init_app as init_catalog_app
+from .utils.cart import init_app as init_cart_app
+from .utils.ledger import init_app as init_ledger_app
+from .utils.rate_limit import init_app as init_rate_limit_app
 
-def create_app(config_name=None):
-    """Application factory function"""
+def create_app(config_name=None, overrides=None):
+    """Application factory function; ``overrides`` are applied on top of the config class"""
     # Determine configuration
     if config_name is None:
         config_name = os.getenv('FLASK_ENV', 'development')
@@ -16,22 +31,47 @@ def create_app(config_name=None):
     
     # Load configuration
     app.config.from_object(config[config_name])
+    if overrides:
+        app.config.update(overrides)
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'], x_proto=1)
     
     # Initialize extensions
     init_db_app(app)
+    init_metrics_app(app)
+    init_cache_app(app)
+    init_auth_app(app)
+    init_passwords_app(app)
+    init_webhooks_app(app)
+    init_verification_app(app)
+    init_images_app(app)
+    init_uploads_app(app)
+    init_assets_app(app)
+    init_compression_app(app)
+    init_catalog_app(app)
+    init_cart_app(app)
+    init_ledger_app(app)
+    init_rate_limit_app(app)
     
     # Register blueprints
     from .routes.main import main
     from .routes.products import products
     from .routes.payments import payments
+    from .routes.cart import cart
+    from .routes.api import api
+    from .routes.metrics import metrics
     
     app.register_blueprint(main)
     app.register_blueprint(products)
     app.register_blueprint(payments)
+    app.register_blueprint(cart)
+    app.register_blueprint(api)
+    app.register_blueprint(metrics)
     
-    # Initialize database tables
-    with app.app_context():
-        from .models.database import init_db
-        init_db()
+    # Apply pending schema migrations (a single version check when up to date)
+    if app.config['AUTO_MIGRATE']:
+        with app.app_context():
+            from .models.database import init_db
+            init_db()
     
     return app 
\ No newline at end of file
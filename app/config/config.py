@@ -10,15 +10,129 @@ class Config:
     PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY', 'sk_test_a2c5d7cacf97b2bf4007a7b3e2871897198c21bf')
     PAYSTACK_PUBLIC_KEY = os.getenv('PAYSTACK_PUBLIC_KEY', 'pk_test_0462a4488b86d64ff1db027d0905c85fb58e4396')
     CALLBACK_URL = os.getenv('CALLBACK_URL', 'http://127.0.0.1:5000/payment-success')
+
+    # Paystack HTTP client
+    PAYSTACK_BASE_URL = os.getenv('PAYSTACK_BASE_URL', 'https://api.paystack.co')
+    PAYSTACK_CONNECT_TIMEOUT = float(os.getenv('PAYSTACK_CONNECT_TIMEOUT', 3.05))  # seconds
+    PAYSTACK_READ_TIMEOUT = float(os.getenv('PAYSTACK_READ_TIMEOUT', 10))  # seconds
+    PAYSTACK_MAX_RETRIES = int(os.getenv('PAYSTACK_MAX_RETRIES', 2))
+    PAYSTACK_RETRY_BACKOFF = float(os.getenv('PAYSTACK_RETRY_BACKOFF', 0.25))  # seconds
+    PAYSTACK_POOL_SIZE = int(os.getenv('PAYSTACK_POOL_SIZE', 10))
+    # Repeated submits of one pay form reuse the first Paystack authorization for this long
+    PAY_IDEMPOTENCY_TTL = int(os.getenv('PAY_IDEMPOTENCY_TTL', 1800))  # seconds
+    PAY_IDEMPOTENCY_WAIT = float(os.getenv('PAY_IDEMPOTENCY_WAIT', 10))  # seconds a retry keeps checking back on the first submit
+    # A submit still setting up holds its key only this long, so a worker killed mid-checkout
+    # does not lock the buyer out; keep it a few times PAY_IDEMPOTENCY_WAIT and above the
+    # slowest Paystack initialization (timeouts x retries) plus LEDGER_ACK_TIMEOUT
+    PAY_CLAIM_LEASE = float(os.getenv('PAY_CLAIM_LEASE', 60))  # seconds
+
+    # Metrics. Set METRICS_DIR to a directory shared by all gunicorn workers
+    # (e.g. /tmp/metrics) so /metrics aggregates every process, not just one.
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))  # seconds
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # if set, /metrics requires "Authorization: Bearer <token>"
+
+    # Webhook ingestion: events are queued and written in batches
+    WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', 10000))
+    WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', 200))
+    WEBHOOK_FLUSH_INTERVAL = float(os.getenv('WEBHOOK_FLUSH_INTERVAL', 0.05))  # seconds
+
+    # Checkouts are group-committed: concurrent orders share one commit, and a
+    # checkout only proceeds to Paystack once its batch is committed
+    LEDGER_QUEUE_SIZE = int(os.getenv('LEDGER_QUEUE_SIZE', 10000))
+    LEDGER_BATCH_SIZE = int(os.getenv('LEDGER_BATCH_SIZE', 500))
+    LEDGER_FLUSH_INTERVAL = float(os.getenv('LEDGER_FLUSH_INTERVAL', 0.002))  # seconds to wait for more orders
+    LEDGER_ACK_TIMEOUT = float(os.getenv('LEDGER_ACK_TIMEOUT', 5.0))  # seconds
+    LEDGER_SYNCHRONOUS = os.getenv('LEDGER_SYNCHRONOUS', 'FULL')  # FULL survives power loss, NORMAL only crashes
+
+    # Background payment verification
+    VERIFY_CONCURRENCY = int(os.getenv('VERIFY_CONCURRENCY', 4))  # concurrent Paystack calls per worker
+    VERIFY_BATCH_SIZE = int(os.getenv('VERIFY_BATCH_SIZE', 20))
+    VERIFY_POLL_INTERVAL = float(os.getenv('VERIFY_POLL_INTERVAL', 2.0))  # seconds
+    VERIFY_LEASE_SECONDS = int(os.getenv('VERIFY_LEASE_SECONDS', 60))
+    VERIFY_MAX_ATTEMPTS = int(os.getenv('VERIFY_MAX_ATTEMPTS', 5))
+    VERIFY_RETRY_BACKOFF = float(os.getenv('VERIFY_RETRY_BACKOFF', 5.0))  # seconds, doubled per attempt
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'app/static/uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))  # processes generating thumbnails
+    IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 80))
     DATABASE_PATH = os.getenv('DATABASE_PATH', 'products.db')
 
+    # SQLite connection pool (per worker process)
+    SQLITE_POOL_SIZE = int(os.getenv('SQLITE_POOL_SIZE', 8))
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))  # milliseconds
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -16000))  # negative = KiB
+    # Schema migrations run at startup; other workers wait this long for the migration lock
+    AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'true').lower() in ('1', 'true', 'yes')
+    MIGRATION_LOCK_TIMEOUT = int(os.getenv('MIGRATION_LOCK_TIMEOUT', 60000))  # milliseconds
+
+    # Products per page on the storefront and seller dashboard
+    CATALOG_PAGE_SIZE = int(os.getenv('CATALOG_PAGE_SIZE', 24))
+    CATALOG_MAX_PAGE_SIZE = int(os.getenv('CATALOG_MAX_PAGE_SIZE', 1000))  # largest ?limit= on those pages
+    # Pages of at least this many products are streamed while rows are fetched (0 disables)
+    CATALOG_STREAM_MIN_PAGE_SIZE = int(os.getenv('CATALOG_STREAM_MIN_PAGE_SIZE', 100))
+    API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 100))  # largest ?limit= the JSON API accepts
+
+    # Rendered catalog page cache (per worker process)
+    CATALOG_CACHE_SIZE = int(os.getenv('CATALOG_CACHE_SIZE', 256))  # entries
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', 300))  # seconds
+    # Per-worker identity map behind Product.get_by_id/get_many (0 disables it).
+    # Saves in other workers become visible here within the TTL; checkout
+    # reads pass validate=True and always see the current row version.
+    PRODUCT_CACHE_SIZE = int(os.getenv('PRODUCT_CACHE_SIZE', 2048))  # products
+    PRODUCT_CACHE_TTL = int(os.getenv('PRODUCT_CACHE_TTL', 10))  # seconds
+
+    # Password hashing. The method must spell out its cost (e.g. iterations):
+    # stored hashes made with a different one are upgraded on next login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))  # processes per worker
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 8))  # beyond this, answer 503
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))  # seconds
+
+    # Per-worker cache of user roles used by seller_required and buyer_required.
+    # Roles changed or users deleted directly in the database keep their old
+    # role in each worker for up to the TTL.
+    ROLE_CACHE_SIZE = int(os.getenv('ROLE_CACHE_SIZE', 10000))  # entries
+    ROLE_CACHE_TTL = int(os.getenv('ROLE_CACHE_TTL', 60))  # seconds
+
+    # Token-bucket rate limits, shared by all workers through the RATE_LIMIT_DB file.
+    # Each endpoint can have a bucket per client IP and per user, written as
+    # "<requests>/<second|minute|hour|day>" (empty disables that bucket).
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', 'ratelimit.db')
+    RATE_LIMIT_METHODS = {'POST'}  # form pages themselves are never limited
+    RATE_LIMITS = {
+        'main.login': {
+            'ip': os.getenv('RATE_LIMIT_LOGIN_IP', '20/minute'),
+            'user': os.getenv('RATE_LIMIT_LOGIN_USER', '5/minute')  # attempts per username from one IP
+        },
+        'main.register': {
+            'ip': os.getenv('RATE_LIMIT_REGISTER_IP', '10/hour')
+        },
+        'payments.pay': {
+            'ip': os.getenv('RATE_LIMIT_PAY_IP', '30/minute'),
+            'user': os.getenv('RATE_LIMIT_PAY_USER', '10/minute')
+        },
+        'cart.checkout': {
+            'ip': os.getenv('RATE_LIMIT_PAY_IP', '30/minute'),
+            'user': os.getenv('RATE_LIMIT_PAY_USER', '10/minute')
+        }
+    }
+    # Number of reverse proxies in front of the app (1 on Render), so the
+    # client IP is taken from X-Forwarded-For instead of the proxy's address
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 0))
+
+    # Serve fingerprinted assets from static/dist (built with `flask assets build`)
+    USE_ASSET_MANIFEST = True
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     TESTING = False
+    USE_ASSET_MANIFEST = False
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -30,6 +144,7 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     DATABASE_PATH = 'test_products.db'
+    RATE_LIMIT_DB = 'test_ratelimit.db'
 
 # Configuration dictionary
 config = {
@@ -1,17 +1,244 @@
 import sqlite3
 import os
+import re
+import queue
+import threading
+import time
+import click
 from flask import current_app, g
+from flask.cli import with_appcontext
+
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports a statement's execute and fetch time to an observer.
+
+    SQLite does most of the work of a SELECT while rows are stepped, so the
+    time spent in fetchone/fetchmany/fetchall and iteration is added to the
+    statement. The total is reported once the statement has no more rows,
+    is replaced by the next execute, or the cursor is closed.
+    """
+
+    observer = None
+    _elapsed = 0.0
+    _pending = False
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def _report(self):
+        if self._pending:
+            self._pending = False
+            self.observer(self._elapsed)
+
+    def _run(self, method, *args):
+        self._report()
+        self._elapsed = 0.0
+        self._pending = True
+        try:
+            self._timed(method, *args)
+        except BaseException:
+            self._report()
+            raise
+        if self.description is None:
+            self._report()
+        return self
+
+    def execute(self, *args):
+        return self._run(super().execute, *args)
+
+    def executemany(self, *args):
+        return self._run(super().executemany, *args)
+
+    def executescript(self, *args):
+        return self._run(super().executescript, *args)
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._report()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        if len(rows) < size:
+            self._report()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._report()
+        return rows
+
+    def __next__(self):
+        try:
+            return self._timed(super().__next__)
+        except StopIteration:
+            self._report()
+            raise
+
+    def close(self):
+        self._report()
+        super().close()
+
+    def __del__(self):
+        # Rows that were never read to the end still count
+        self._report()
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection whose close() hands it back to its pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.released = False
+
+    def _statement(self, method, *args):
+        """Run a statement on a new cursor, timed if the pool has an observer"""
+        observer = self.pool.observer if self.pool is not None else None
+        if observer is None:
+            cursor = self.cursor()
+        else:
+            cursor = self.cursor(TimedCursor)
+            cursor.observer = observer
+        return getattr(cursor, method)(*args)
+
+    def execute(self, *args):
+        return self._statement('execute', *args)
+
+    def executemany(self, *args):
+        return self._statement('executemany', *args)
+
+    def executescript(self, *args):
+        return self._statement('executescript', *args)
+
+    def close(self):
+        """Return the connection to its pool (or really close it if unpooled)"""
+        if self.pool is None:
+            super().close()
+        elif not self.released:
+            self.pool.release(self)
+
+    def discard(self):
+        """Close the underlying SQLite handle"""
+        self.pool = None
+        self.released = True
+        super().close()
+
+class ConnectionPool:
+    """Per-process pool of pre-configured SQLite connections.
+
+    Connections are configured once when they are opened (WAL journal,
+    busy timeout, synchronous level, mmap and page cache size) and then
+    reused for the lifetime of the worker. Idle connections are kept in a
+    LIFO queue so the most recently used (warmest) one is handed out first.
+    The pool never blocks: if every connection is checked out a new one is
+    opened, and surplus connections are closed on release.
+    """
+
+    def __init__(self, database, size=8, busy_timeout=5000, synchronous='NORMAL',
+                 mmap_size=0, cache_size=-2000):
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f'Invalid SQLITE_SYNCHRONOUS level: {synchronous}')
+        self.database = database
+        self.size = size
+        self.busy_timeout = int(busy_timeout)
+        self.synchronous = synchronous
+        self.mmap_size = int(mmap_size)
+        self.cache_size = int(cache_size)
+        # observer(seconds) is called after every statement run through a pooled connection
+        self.observer = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Connections inherited across fork() must not be used by the child,
+        # so a new process simply starts with an empty pool.
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._wal_enabled = False
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.busy_timeout / 1000,
+            factory=PooledConnection,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            if not self._wal_enabled:
+                # journal_mode is persistent in the database file; set it once per process
+                conn.execute('PRAGMA journal_mode = WAL')
+                self._wal_enabled = True
+        conn.execute(f'PRAGMA busy_timeout = {self.busy_timeout}')
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        conn.execute(f'PRAGMA mmap_size = {self.mmap_size}')
+        conn.execute(f'PRAGMA cache_size = {self.cache_size}')
+        conn.pool = self
+        return conn
+
+    def acquire(self):
+        """Check a connection out of the pool"""
+        if os.getpid() != self._pid:
+            self._reset()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        conn.released = False
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back any open transaction"""
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = sqlite3.Row
+        conn.released = True
+        if os.getpid() != self._pid or self._idle.qsize() >= self.size:
+            conn.discard()
+            return
+        self._idle.put_nowait(conn)
+
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self._idle.get_nowait().discard()
+            except queue.Empty:
+                break
+
+def create_pool(config):
+    """Build a connection pool from application config"""
+    return ConnectionPool(
+        config['DATABASE_PATH'],
+        size=config['SQLITE_POOL_SIZE'],
+        busy_timeout=config['SQLITE_BUSY_TIMEOUT'],
+        synchronous=config['SQLITE_SYNCHRONOUS'],
+        mmap_size=config['SQLITE_MMAP_SIZE'],
+        cache_size=config['SQLITE_CACHE_SIZE']
+    )
+
+def get_pool():
+    """Get the connection pool of the current app"""
+    return current_app.extensions['sqlite_pool']
 
 def get_db_connection():
-    conn = sqlite3.connect(current_app.config['DATABASE_PATH'])
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Borrow a pooled connection; close() returns it to the pool"""
+    return get_pool().acquire()
 
 def get_db():
-    """Get database connection"""
-    if 'db' not in g:
-        g.db = sqlite3.connect(current_app.config['DATABASE_PATH'])
-        g.db.row_factory = sqlite3.Row
+    """Get the request-scoped database connection"""
+    if 'db' not in g or g.db.released:
+        g.db = get_db_connection()
     return g.db
 
 def close_db(e=None):
@@ -20,15 +247,114 @@ def close_db(e=None):
     if db is not None:
         db.close()
 
+def load_migrations(directory=MIGRATIONS_DIR):
+    """List ``(version, name, path)`` of every migration file, oldest first"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError('Duplicate migration version numbers in ' + directory)
+    return migrations
+
+def split_statements(script):
+    """Split a SQL script into complete statements (trigger bodies stay whole)"""
+    statements = []
+    buffer = ''
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ''
+    leftover = [line for line in buffer.splitlines() if line.strip() and not line.strip().startswith('--')]
+    if leftover:
+        raise ValueError('Incomplete SQL statement at end of migration')
+    return statements
+
+def get_schema_version(conn):
+    """Highest applied migration version, or 0 for a fresh database"""
+    try:
+        return conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0
+
+def migrate(conn, migrations=None, lock_timeout=60000):
+    """Apply pending migrations and return the ``(version, name)`` of each one applied.
+
+    When the schema is current this is a single indexed query. Otherwise
+    the migrations run inside one BEGIN EXCLUSIVE transaction, so when
+    several workers boot together one migrates while the rest wait on the
+    lock, re-check the version and find nothing left to do. A failing
+    migration rolls back completely.
+    """
+    migrations = load_migrations() if migrations is None else migrations
+    latest = migrations[-1][0] if migrations else 0
+    if get_schema_version(conn) >= latest:
+        return []
+
+    busy_timeout = conn.execute('PRAGMA busy_timeout').fetchone()[0]
+    conn.execute(f'PRAGMA busy_timeout = {int(lock_timeout)}')
+    try:
+        conn.execute('BEGIN EXCLUSIVE')
+        try:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            current = get_schema_version(conn)
+            applied = []
+            for version, name, path in migrations:
+                if version <= current:
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    for statement in split_statements(f.read()):
+                        conn.execute(statement)
+                conn.execute('INSERT INTO schema_version (version, name) VALUES (?, ?)', (version, name))
+                applied.append((version, name))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    finally:
+        conn.execute(f'PRAGMA busy_timeout = {busy_timeout}')
+    return applied
+
 def init_db():
-    """Initialize database with tables"""
-    db = get_db()
-    
-    # Read schema file from the correct path
-    schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
-    with open(schema_path, 'r', encoding='utf-8') as f:
-        db.executescript(f.read())
+    """Bring the database schema up to date"""
+    applied = migrate(get_db(), lock_timeout=current_app.config['MIGRATION_LOCK_TIMEOUT'])
+    for version, name in applied:
+        current_app.logger.info('Applied migration %04d_%s', version, name)
+    return applied
+
+@click.group('db')
+def db_cli():
+    """Database schema commands."""
+
+@db_cli.command('migrate')
+@with_appcontext
+def migrate_command():
+    """Apply pending schema migrations."""
+    applied = init_db()
+    for version, name in applied:
+        click.echo(f'Applied {version:04d}_{name}')
+    click.echo(f'Schema is at version {get_schema_version(get_db())}.')
+
+@db_cli.command('status')
+@with_appcontext
+def status_command():
+    """Show applied and pending schema migrations."""
+    current = get_schema_version(get_db())
+    for version, name, _ in load_migrations():
+        click.echo(f"{'applied' if version <= current else 'pending'}  {version:04d}_{name}")
 
 def init_app(app):
     """Initialize app with database"""
-    app.teardown_appcontext(close_db) 
\ No newline at end of file
+    app.extensions['sqlite_pool'] = create_pool(app.config)
+    app.teardown_appcontext(close_db)
+    app.cli.add_command(db_cli)
@@ -0,0 +1,70 @@
+from .database import get_db
+
+# Paystack outcomes that are appended to the ledger
+OUTCOME_EVENTS = ('success', 'failed', 'reversed')
+
+class OrderLedger:
+    """Append-only log of order lines and their payment outcomes.
+
+    The append methods take the caller's connection and do not commit, so
+    ledger rows are written in the same transaction as the change they
+    describe.
+    """
+
+    @staticmethod
+    def append_placed(db, orders):
+        """Append a 'placed' row for every line item of the given orders"""
+        db.executemany('''
+        INSERT OR IGNORE INTO order_ledger
+            (reference, event, product_id, seller_id, buyer_id, name, quantity, unit_price, amount)
+        VALUES (:reference, 'placed', :product_id, :seller_id, :buyer_id, :name, :quantity, :unit_price,
+                CAST(ROUND(:unit_price * 100) AS INTEGER) * :quantity)
+        ''', [dict(item, reference=order['reference'], buyer_id=order.get('buyer_id'))
+              for order in orders for item in order.get('items') or ()])
+
+    @staticmethod
+    def append_outcomes(db, rows):
+        """Append outcome rows, copying the lines of each placed order.
+
+        An event is only appended if the transaction is now in that status,
+        so events ignored by the transactions upsert are ignored here too.
+        """
+        db.executemany('''
+        INSERT OR IGNORE INTO order_ledger
+            (reference, event, product_id, seller_id, buyer_id, name, quantity, unit_price, amount)
+        SELECT reference, :status, product_id, seller_id, buyer_id, name, quantity, unit_price, amount
+        FROM order_ledger
+        WHERE reference = :reference AND event = 'placed'
+          AND EXISTS (SELECT 1 FROM transactions t WHERE t.reference = :reference AND t.status = :status)
+        ''', [row for row in rows if row['status'] in OUTCOME_EVENTS])
+
+    @staticmethod
+    def get_sales(seller_id, limit, before_id=None):
+        """Get a seller's paid, unreversed order lines, newest first; returns ``(rows, next_before_id)``"""
+        rows = get_db().execute('''
+        SELECT id, reference, product_id, buyer_id, name, quantity, unit_price, amount, recorded_at
+        FROM order_ledger l
+        WHERE seller_id = ? AND event = 'success' AND id < ?
+          AND NOT EXISTS (
+              SELECT 1 FROM order_ledger r
+              WHERE r.reference = l.reference AND r.event = 'reversed' AND r.product_id = l.product_id
+          )
+        ORDER BY id DESC
+        LIMIT ?
+        ''', (seller_id, before_id if before_id is not None else 2 ** 63 - 1, limit + 1)).fetchall()
+        sales = [dict(row) for row in rows[:limit]]
+        next_before_id = sales[-1]['id'] if len(rows) > limit else None
+        return sales, next_before_id
+
+    @staticmethod
+    def get_sales_totals(seller_id):
+        """Paid lines, units and revenue (in kobo) of one seller, all net of reversals"""
+        row = get_db().execute('''
+        SELECT
+            COALESCE(SUM(CASE event WHEN 'success' THEN 1 ELSE -1 END), 0) AS lines,
+            COALESCE(SUM(CASE event WHEN 'success' THEN quantity ELSE -quantity END), 0) AS units,
+            COALESCE(SUM(CASE event WHEN 'success' THEN amount ELSE -amount END), 0) AS revenue
+        FROM order_ledger
+        WHERE seller_id = ? AND event IN ('success', 'reversed')
+        ''', (seller_id,)).fetchone()
+        return dict(row)
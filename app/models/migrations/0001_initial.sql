@@ -0,0 +1,159 @@
+-- Initial schema. Every statement is idempotent so that databases created
+-- by the old schema.sql bootstrap can be adopted without losing data.
+CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            price REAL NOT NULL,
+            image_path TEXT,
+            seller_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (seller_id) REFERENCES users (id)
+); 
+
+CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            user_type TEXT NOT NULL CHECK (user_type IN ('buyer', 'seller')),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Keyset pagination indexes for the storefront and seller dashboard
+CREATE INDEX IF NOT EXISTS idx_products_created_id ON products (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_products_seller_created_id ON products (seller_id, created_at, id);
+
+-- Full-text index over product name/description. External content table:
+-- the triggers below keep it in sync with every write to products.
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name,
+            description,
+            content='products',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+
+INSERT INTO products_fts (products_fts) VALUES ('rebuild');
+
+-- Catalog version: bumped by every write to products so cached catalog
+-- pages and ETags are invalidated as soon as the write commits.
+CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_insert AFTER INSERT ON products BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_update AFTER UPDATE ON products BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_delete AFTER DELETE ON products BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+END;
+
+-- Payment transactions, one row per Paystack reference
+CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reference TEXT UNIQUE NOT NULL,
+            status TEXT NOT NULL,
+            amount INTEGER,
+            currency TEXT,
+            email TEXT,
+            product_id INTEGER,
+            buyer_id INTEGER,
+            last_event TEXT,
+            paid_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_buyer ON transactions (buyer_id, created_at);
+
+-- Background payment verification queue (times are unix epoch seconds)
+CREATE TABLE IF NOT EXISTS verification_jobs (
+            reference TEXT PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'done', 'failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            lease_expires_at REAL,
+            claimed_by TEXT,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_verification_jobs_due ON verification_jobs (status, next_attempt_at);
+
+-- Content-addressed uploads: one file per distinct content, shared by reference count
+CREATE TABLE IF NOT EXISTS uploads (
+            path TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Materialized product statistics: one row per seller plus seller_id = 0 for
+-- the whole catalog, kept current by the triggers below (O(1) per write).
+-- `flask products rebuild-stats` recomputes it from scratch.
+CREATE TABLE IF NOT EXISTS product_stats (
+            seller_id INTEGER PRIMARY KEY,
+            total_products INTEGER NOT NULL DEFAULT 0,
+            total_value REAL NOT NULL DEFAULT 0,
+            products_with_images INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO product_stats (seller_id) VALUES (0);
+
+CREATE TRIGGER IF NOT EXISTS product_stats_insert AFTER INSERT ON products BEGIN
+    INSERT OR IGNORE INTO product_stats (seller_id) VALUES (new.seller_id);
+    UPDATE product_stats SET
+        total_products = total_products + 1,
+        total_value = total_value + new.price,
+        products_with_images = products_with_images + (new.image_path IS NOT NULL)
+    WHERE seller_id IN (0, new.seller_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_stats_delete AFTER DELETE ON products BEGIN
+    UPDATE product_stats SET
+        total_products = total_products - 1,
+        total_value = total_value - old.price,
+        products_with_images = products_with_images - (old.image_path IS NOT NULL)
+    WHERE seller_id IN (0, old.seller_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_stats_update AFTER UPDATE OF price, image_path, seller_id ON products BEGIN
+    UPDATE product_stats SET
+        total_products = total_products - 1,
+        total_value = total_value - old.price,
+        products_with_images = products_with_images - (old.image_path IS NOT NULL)
+    WHERE seller_id IN (0, old.seller_id);
+    INSERT OR IGNORE INTO product_stats (seller_id) VALUES (new.seller_id);
+    UPDATE product_stats SET
+        total_products = total_products + 1,
+        total_value = total_value + new.price,
+        products_with_images = products_with_images + (new.image_path IS NOT NULL)
+    WHERE seller_id IN (0, new.seller_id);
+END;
+
+-- Bring derived data in line with any pre-existing products
+DELETE FROM product_stats;
+INSERT INTO product_stats (seller_id, total_products, total_value, products_with_images)
+SELECT 0, COUNT(*), COALESCE(SUM(price), 0), COUNT(image_path) FROM products
+UNION ALL
+SELECT seller_id, COUNT(*), SUM(price), COUNT(image_path) FROM products GROUP BY seller_id;
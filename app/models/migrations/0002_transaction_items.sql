@@ -0,0 +1,11 @@
+-- Line items of multi-product (cart) checkouts, priced when the order was placed
+CREATE TABLE IF NOT EXISTS transaction_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reference TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            quantity INTEGER NOT NULL CHECK (quantity > 0),
+            unit_price REAL NOT NULL,
+            FOREIGN KEY (reference) REFERENCES transactions (reference)
+);
+CREATE INDEX IF NOT EXISTS idx_transaction_items_reference ON transaction_items (reference);
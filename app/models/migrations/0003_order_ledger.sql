@@ -0,0 +1,30 @@
+-- Append-only order ledger: one row per order line per event ('placed' at
+-- checkout, then the Paystack outcome: 'success', 'failed' or 'reversed').
+-- Rows are never changed; a later event is a new row. Amounts are in kobo.
+CREATE TABLE IF NOT EXISTS order_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reference TEXT NOT NULL,
+            event TEXT NOT NULL CHECK (event IN ('placed', 'success', 'failed', 'reversed')),
+            product_id INTEGER NOT NULL,
+            seller_id INTEGER NOT NULL,
+            buyer_id INTEGER,
+            name TEXT NOT NULL,
+            quantity INTEGER NOT NULL CHECK (quantity > 0),
+            unit_price REAL NOT NULL,
+            amount INTEGER NOT NULL,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+-- Redelivered events are ignored instead of duplicated
+CREATE UNIQUE INDEX IF NOT EXISTS idx_order_ledger_event ON order_ledger (reference, event, product_id);
+-- Seller sales lookups, newest first
+CREATE INDEX IF NOT EXISTS idx_order_ledger_seller ON order_ledger (seller_id, event, id);
+
+CREATE TRIGGER IF NOT EXISTS order_ledger_no_update BEFORE UPDATE ON order_ledger
+BEGIN
+    SELECT RAISE(ABORT, 'order_ledger is append-only');
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_ledger_no_delete BEFORE DELETE ON order_ledger
+BEGIN
+    SELECT RAISE(ABORT, 'order_ledger is append-only');
+END;
@@ -0,0 +1,11 @@
+-- Idempotent checkout: one row per (buyer, product, form nonce), keyed by
+-- its sha256. Holds the Paystack authorization of the first submit so
+-- retries reuse it until expires_at (unix epoch seconds).
+CREATE TABLE IF NOT EXISTS payment_attempts (
+            key TEXT PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'ready')),
+            reference TEXT,
+            auth_url TEXT,
+            expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_payment_attempts_expires ON payment_attempts (expires_at);
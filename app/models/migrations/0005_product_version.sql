@@ -0,0 +1,2 @@
+-- Row version for optimistic updates and for invalidating cached products
+ALTER TABLE products ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,6 @@
+-- Whether an image's resized derivatives have been generated, recorded when
+-- they are written so rendering a page never has to stat for them. Kept on
+-- the upload and copied to every product using it.
+ALTER TABLE uploads ADD COLUMN variants_ready INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE products ADD COLUMN image_variants INTEGER NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS idx_products_image_path ON products (image_path);
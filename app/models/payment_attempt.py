@@ -0,0 +1,49 @@
+import time
+from .database import get_db
+
+class PaymentAttempt:
+    """Claims on checkout idempotency keys and the authorization each one produced"""
+
+    @staticmethod
+    def claim(key, lease):
+        """Claim ``key`` for ``lease`` seconds while its checkout is set up.
+
+        The lease is kept short, so a claim whose worker died before
+        completing or releasing it frees itself soon. Returns
+        ``(True, None)`` if this caller now owns the key (it was new, or its
+        previous claim had expired), otherwise ``(False, row)`` with the
+        current claim. Expired claims are pruned on the way.
+        """
+        now = time.time()
+        db = get_db()
+        with db:
+            db.execute('DELETE FROM payment_attempts WHERE expires_at < ?', (now,))
+            claimed = db.execute('''
+            INSERT OR IGNORE INTO payment_attempts (key, expires_at) VALUES (?, ?)
+            ''', (key, now + lease)).rowcount == 1
+        if claimed:
+            return True, None
+        return False, PaymentAttempt.get(key)
+
+    @staticmethod
+    def get(key):
+        """Get an unexpired claim, or None"""
+        return get_db().execute(
+            'SELECT * FROM payment_attempts WHERE key = ? AND expires_at >= ?', (key, time.time())
+        ).fetchone()
+
+    @staticmethod
+    def complete(key, reference, auth_url, ttl):
+        """Store the authorization produced for a claimed key and keep it for ``ttl`` seconds"""
+        db = get_db()
+        with db:
+            db.execute('''
+            UPDATE payment_attempts SET status = 'ready', reference = ?, auth_url = ?, expires_at = ? WHERE key = ?
+            ''', (reference, auth_url, time.time() + ttl, key))
+
+    @staticmethod
+    def release(key):
+        """Drop a claim whose checkout failed, so a retry starts afresh"""
+        db = get_db()
+        with db:
+            db.execute("DELETE FROM payment_attempts WHERE key = ? AND status = 'pending'", (key,))
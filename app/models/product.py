@@ -1,17 +1,70 @@
-from datetime import datetime
-from .database import get_db
+import re
+from datetime import datetime, timezone
+from flask import current_app
+from .database import get_db, get_db_connection
+from app.utils.pagination import encode_cursor, CursorPage
+
+# Column weights for bm25(): a hit in the name counts ten times a hit in the description
+SEARCH_WEIGHTS = (10.0, 1.0)
+MAX_SEARCH_TERMS = 8
+
+# Product fields exposed by the JSON API and the column each one selects
+API_FIELDS = {
+    'id': 'p.id',
+    'name': 'p.name',
+    'description': 'p.description',
+    'price': 'p.price',
+    'image_path': 'p.image_path',
+    'seller_id': 'p.seller_id',
+    'seller_name': 'u.username',
+    'created_at': 'p.created_at',
+}
+
+# Whether the upload bound last has generated derivatives (see app/utils/images.py)
+IMAGE_VARIANTS_OF_PATH = 'COALESCE((SELECT variants_ready FROM uploads WHERE path = ?), 0)'
+
+def build_match_query(query):
+    """Turn free text into a safe FTS5 MATCH expression (prefix AND of each term)"""
+    terms = re.findall(r'\w+', query or '')[:MAX_SEARCH_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+class StaleProductError(Exception):
+    """Raised by save() when the product was changed since it was read"""
+
+def _identity_map():
+    """This worker's cache of products by id (see get_many), or None outside an app"""
+    return current_app.extensions.get('product_cache') if current_app else None
 
 class Product:
-    """Product model class"""
-    
-    def __init__(self, id=None, name=None, description=None, price=None, image_path=None, created_at=None):
+    """Product model class.
+
+    Instances use __slots__, so a page of products carries no per-object
+    __dict__. Products returned by get_by_id() and get_many() may be
+    shared with other requests through the identity map: change them only
+    to save() them.
+    """
+
+    __slots__ = ('id', 'name', 'description', 'price', 'image_path', 'created_at',
+                 'seller_id', 'seller_name', 'version', 'image_variants')
+
+    def __init__(self, id=None, name=None, description=None, price=None, image_path=None, created_at=None,
+                 seller_id=None, seller_name=None, version=None, image_variants=0):
         self.id = id
         self.name = name
         self.description = description
         self.price = price
         self.image_path = image_path
         self.created_at = created_at
-    
+        self.seller_id = seller_id
+        self.seller_name = seller_name
+        self.version = version
+        self.image_variants = image_variants
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a product from a query row, ignoring columns that are not product fields"""
+        return cls(**{key: row[key] for key in row.keys() if key in cls.__slots__})
+
     @staticmethod
     def get_all():
         """Get all products ordered by creation date"""
@@ -23,53 +76,338 @@ class Product:
         ORDER BY p.created_at DESC
          ''').fetchall()    
         db.close()
-        return [Product(**dict(product)) for product in products]
+        return [Product.from_row(product) for product in products]
     
     @staticmethod
-    def get_by_id(product_id):
-        """Get product by ID"""
+    def get_page(limit, cursor=None, seller_id=None):
+        """Get one page of products, newest first, using keyset pagination.
+
+        ``cursor`` is the decoded ``(created_at, id)`` of the last product on
+        the previous page. Returns ``(products, next_cursor)`` where
+        ``next_cursor`` is None on the last page.
+        """
+        where, params = Product._page_filter(cursor, seller_id)
         db = get_db()
-        product = db.execute('SELECT * FROM products WHERE id = ?', (product_id,)).fetchone()
-        return Product(**dict(product)) if product else None
-    
+        rows = db.execute(f'''
+        SELECT p.*, u.username as seller_name
+        FROM products p
+        JOIN users u ON p.seller_id = u.id
+        {where}
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT ?
+        ''', (*params, limit + 1)).fetchall()
+        products = [Product.from_row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = products[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return products, next_cursor
+
+    @staticmethod
+    def stream_page(limit, cursor=None, seller_id=None, batch_size=100):
+        """Like get_page, but as a streamed CursorPage that fetches rows in batches while iterated.
+
+        Only ``batch_size`` rows are held at a time, so memory does not grow
+        with the page size. Streamed products bypass the identity map.
+        """
+        where, params = Product._page_filter(cursor, seller_id)
+
+        def rows():
+            conn = get_db_connection()
+            try:
+                result = conn.execute(f'''
+                SELECT p.*, u.username as seller_name
+                FROM products p
+                JOIN users u ON p.seller_id = u.id
+                {where}
+                ORDER BY p.created_at DESC, p.id DESC
+                LIMIT ?
+                ''', (*params, limit + 1))
+                while True:
+                    batch = result.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        yield Product.from_row(row)
+            finally:
+                conn.close()
+
+        return CursorPage(rows(), limit=limit,
+                          cursor_of=lambda product: encode_cursor(product.created_at, product.id))
+
+    @staticmethod
+    def _page_filter(cursor, seller_id):
+        conditions = []
+        params = []
+        if seller_id is not None:
+            conditions.append('p.seller_id = ?')
+            params.append(seller_id)
+        if cursor is not None:
+            conditions.append('(p.created_at, p.id) < (?, ?)')
+            params.extend(cursor)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return where, params
+
+    @staticmethod
+    def _projection(fields):
+        columns = ', '.join(f'{API_FIELDS[field]} AS {field}' for field in fields)
+        join = 'JOIN users u ON p.seller_id = u.id' if 'seller_name' in fields else ''
+        return columns, join
+
+    @staticmethod
+    def get_fields_page(fields, limit, cursor=None, seller_id=None):
+        """Like get_page, but select only ``fields`` (keys of API_FIELDS) and return dicts"""
+        columns, join = Product._projection(fields)
+        where, params = Product._page_filter(cursor, seller_id)
+        db = get_db()
+        rows = db.execute(f'''
+        SELECT {columns}, p.created_at AS _cursor_created_at, p.id AS _cursor_id
+        FROM products p
+        {join}
+        {where}
+        ORDER BY p.created_at DESC, p.id DESC
+        LIMIT ?
+        ''', (*params, limit + 1)).fetchall()
+        items = [{field: row[field] for field in fields} for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last['_cursor_created_at'], last['_cursor_id'])
+        return items, next_cursor
+
+    @staticmethod
+    def get_fields_by_id(product_id, fields):
+        """Get the selected ``fields`` of one product as a dict, or None"""
+        columns, join = Product._projection(fields)
+        row = get_db().execute(f'''
+        SELECT {columns} FROM products p {join} WHERE p.id = ?
+        ''', (product_id,)).fetchone()
+        return dict(row) if row else None
+
+    @staticmethod
+    def search(query, limit, cursor=None):
+        """Full-text search ranked by bm25, using keyset pagination.
+
+        ``cursor`` is the decoded ``(score, id)`` of the last hit on the
+        previous page. Returns ``(products, next_cursor)``.
+        """
+        match = build_match_query(query)
+        if not match:
+            return [], None
+        params = [*SEARCH_WEIGHTS, match]
+        where = ''
+        if cursor is not None:
+            where = 'WHERE (s.score, p.id) > (?, ?)'
+            params.extend(cursor)
+        db = get_db()
+        rows = db.execute(f'''
+        SELECT p.*, u.username as seller_name, s.score
+        FROM (
+            SELECT rowid, bm25(products_fts, ?, ?) AS score
+            FROM products_fts
+            WHERE products_fts MATCH ?
+        ) s
+        JOIN products p ON p.id = s.rowid
+        JOIN users u ON p.seller_id = u.id
+        {where}
+        ORDER BY s.score, p.id
+        LIMIT ?
+        ''', (*params, limit + 1)).fetchall()
+        products = [Product.from_row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(rows[limit - 1]['score'], products[-1].id)
+        return products, next_cursor
+
+    @staticmethod
+    def get_by_id(product_id, validate=False):
+        """Get product by ID, from this worker's identity map when possible (see get_many)"""
+        return Product.get_many([product_id], validate=validate).get(product_id)
+
+    @staticmethod
+    def get_many(product_ids, validate=False):
+        """Get several products as a dict keyed by id.
+
+        Products in the identity map are served from it without a query;
+        the rest are loaded with a single ``IN (...)`` query and cached.
+        save() and delete() drop cached products in this worker, and those
+        changed by other workers are replaced once PRODUCT_CACHE_TTL runs
+        out. Pass ``validate=True`` where a stale price or a deleted
+        product must not slip through (checkout): the row versions are
+        then checked with one indexed query and outdated entries reloaded.
+        """
+        cache = _identity_map()
+        db = get_db()
+        product_ids = set(product_ids)
+        versions = None
+        if validate and cache is not None and product_ids:
+            placeholders = ', '.join('?' * len(product_ids))
+            rows = db.execute(f'SELECT id, version FROM products WHERE id IN ({placeholders})', list(product_ids))
+            versions = {row['id']: row['version'] for row in rows}
+            for product_id in product_ids - versions.keys():
+                cache.delete(product_id)
+            product_ids = versions.keys()
+        found = {}
+        missing = []
+        for product_id in product_ids:
+            product = cache.get(product_id) if cache is not None else None
+            if product is None or (versions is not None and product.version != versions[product_id]):
+                missing.append(product_id)
+            else:
+                found[product_id] = product
+        if missing:
+            placeholders = ', '.join('?' * len(missing))
+            rows = db.execute(f'SELECT * FROM products WHERE id IN ({placeholders})', missing).fetchall()
+            for row in rows:
+                product = found[row['id']] = Product.from_row(row)
+                if cache is not None:
+                    cache.set(product.id, product)
+        return found
+
+    def _evict(self):
+        cache = _identity_map()
+        if cache is not None and self.id is not None:
+            cache.delete(self.id)
+
     def save(self):
-        """Save product to database"""
+        """Save product to database.
+
+        Updates only apply to the version that was read; if someone else
+        saved the product in between, StaleProductError is raised.
+        """
         db = get_db()
         if self.id:
             # Update existing product
-            db.execute(
-                'UPDATE products SET name = ?, description = ?, price = ?, image_path = ? WHERE id = ?',
-                (self.name, self.description, self.price, self.image_path, self.id)
-            )
+            try:
+                row = db.execute(
+                    f'''UPDATE products SET name = ?, description = ?, price = ?, version = version + 1,
+                        image_variants = CASE WHEN image_path IS ? THEN image_variants ELSE
+                            {IMAGE_VARIANTS_OF_PATH} END,
+                        image_path = ?
+                    WHERE id = ? AND version = ?
+                    RETURNING image_variants''',
+                    (self.name, self.description, self.price, self.image_path, self.image_path, self.image_path,
+                     self.id, self.version)
+                ).fetchone()
+                if row is None:
+                    db.rollback()
+                    raise StaleProductError(f'Product {self.id} was changed or deleted')
+                db.commit()
+                self.image_variants = row[0]
+            finally:
+                # Dropped even on failure: the cached object may be this one, already modified
+                self._evict()
+            self.version += 1
         else:
             # Insert new product
             cursor = db.execute(
-                'INSERT INTO products (name, description, price, image_path) VALUES (?, ?, ?, ?)',
-                (self.name, self.description, self.price, self.image_path)
+                f'''INSERT INTO products (name, description, price, image_path, seller_id, image_variants)
+                VALUES (?, ?, ?, ?, ?, {IMAGE_VARIANTS_OF_PATH})
+                RETURNING id, version, created_at, image_variants''',
+                (self.name, self.description, self.price, self.image_path, self.seller_id, self.image_path)
             )
-            self.id = cursor.lastrowid
-        db.commit()
+            self.id, self.version, self.created_at, self.image_variants = cursor.fetchone()
+            db.commit()
         return self
-    
+
     def delete(self):
         """Delete product from database"""
         if self.id:
             db = get_db()
             db.execute('DELETE FROM products WHERE id = ?', (self.id,))
             db.commit()
+            self._evict()
             return True
         return False
-    
+
     @staticmethod
-    def get_stats():
-        """Get product statistics"""
+    def insert_many(rows):
+        """Insert ``(name, description, price, image_path, seller_id)`` rows in one transaction"""
         db = get_db()
-        total_products = db.execute('SELECT COUNT(*) FROM products').fetchone()[0]
-        total_value = db.execute('SELECT SUM(price) FROM products').fetchone()[0] or 0
-        products_with_images = db.execute('SELECT COUNT(*) FROM products WHERE image_path IS NOT NULL').fetchone()[0]
-        
+        with db:
+            Product.insert_rows(db, rows)
+        return len(rows)
+
+    @staticmethod
+    def insert_rows(db, rows):
+        """Like insert_many, but on the caller's connection and without committing"""
+        db.executemany(
+            f'''INSERT INTO products (name, description, price, image_path, seller_id, image_variants)
+            VALUES (?, ?, ?, ?, ?, {IMAGE_VARIANTS_OF_PATH})''',
+            [(*row, row[3]) for row in rows]
+        )
+        return len(rows)
+
+    @staticmethod
+    def iter_export(seller_id=None, batch_size=1000):
+        """Yield every product (as a row with seller_name), oldest first, fetching in batches"""
+        where = 'WHERE p.seller_id = ?' if seller_id is not None else ''
+        params = (seller_id,) if seller_id is not None else ()
+        conn = get_db_connection()
+        try:
+            cursor = conn.execute(f'''
+            SELECT p.id, p.name, p.description, p.price, p.image_path, u.username AS seller_name, p.created_at
+            FROM products p
+            JOIN users u ON p.seller_id = u.id
+            {where}
+            ORDER BY p.id
+            ''', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    @staticmethod
+    def get_catalog_version():
+        """Get the catalog version counter, bumped by every product write"""
+        db = get_db()
+        row = db.execute('SELECT version FROM catalog_version WHERE id = 1').fetchone()
+        return row['version'] if row else 0
+
+    @staticmethod
+    def get_catalog_state():
+        """Get the catalog version and the UTC time of the last product write"""
+        row = get_db().execute('SELECT version, updated_at FROM catalog_version WHERE id = 1').fetchone()
+        if row is None:
+            return 0, None
+        updated_at = datetime.strptime(row['updated_at'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        return row['version'], updated_at
+
+    @staticmethod
+    def touch_catalog():
+        """Bump the catalog version without changing a product"""
+        db = get_db()
+        db.execute('UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1')
+        db.commit()
+
+    @staticmethod
+    def get_stats(seller_id=None):
+        """Get product statistics, optionally for a single seller"""
+        row = get_db().execute('''
+        SELECT total_products, total_value, products_with_images
+        FROM product_stats WHERE seller_id = ?
+        ''', (seller_id or 0,)).fetchone()
+        if row is None:
+            return {'total_products': 0, 'total_value': 0, 'products_with_images': 0}
         return {
-            'total_products': total_products,
-            'total_value': total_value,
-            'products_with_images': products_with_images
-        } 
\ No newline at end of file
+            'total_products': row['total_products'],
+            'total_value': round(row['total_value'], 2),
+            'products_with_images': row['products_with_images']
+        }
+
+    @staticmethod
+    def rebuild_stats():
+        """Recompute the materialized product statistics from the products table"""
+        db = get_db()
+        with db:
+            db.execute('DELETE FROM product_stats')
+            db.execute('''
+            INSERT INTO product_stats (seller_id, total_products, total_value, products_with_images)
+            SELECT 0, COUNT(*), COALESCE(SUM(price), 0), COUNT(image_path) FROM products
+            UNION ALL
+            SELECT seller_id, COUNT(*), SUM(price), COUNT(image_path) FROM products GROUP BY seller_id
+            ''')
+        return db.execute('SELECT COUNT(*) FROM product_stats WHERE seller_id != 0').fetchone()[0] 
\ No newline at end of file
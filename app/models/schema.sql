@@ -1,21 +0,0 @@
-DROP TABLE IF EXISTS products;
- CREATE TABLE IF NOT EXISTS products (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT,
-            price REAL NOT NULL,
-            image_path TEXT,
-            seller_id INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (seller_id) REFERENCES users (id)
-); 
-
-DROP TABLE IF EXISTS users;
-CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            user_type TEXT NOT NULL CHECK (user_type IN ('buyer', 'seller')),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
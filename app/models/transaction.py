@@ -0,0 +1,97 @@
+from .database import get_db
+from .ledger import OrderLedger
+
+class Transaction:
+    """Payment transaction keyed by Paystack reference"""
+
+    @staticmethod
+    def record_pending(reference, amount, email, product_id=None, buyer_id=None, items=None):
+        """Record a transaction that has been initialized but not paid.
+
+        ``items`` are the line items of the checkout, as dicts with
+        product_id, seller_id, name, quantity and unit_price.
+        """
+        Transaction.record_orders([{
+            'reference': reference,
+            'amount': amount,
+            'email': email,
+            'product_id': product_id,
+            'buyer_id': buyer_id,
+            'items': items
+        }])
+
+    @staticmethod
+    def record_orders(orders):
+        """Record a batch of initialized checkouts in a single transaction.
+
+        Each order is a dict with the record_pending() arguments. Its
+        pending transaction, line items and 'placed' ledger rows are all
+        written by the same commit.
+        """
+        db = get_db()
+        with db:
+            db.executemany(
+                '''INSERT OR IGNORE INTO transactions (reference, status, amount, email, product_id, buyer_id)
+                VALUES (:reference, 'pending', :amount, :email, :product_id, :buyer_id)''',
+                [{key: order.get(key) for key in ('reference', 'amount', 'email', 'product_id', 'buyer_id')}
+                 for order in orders]
+            )
+            items = [dict(item, reference=order['reference']) for order in orders for item in order.get('items') or ()]
+            if items:
+                db.executemany(
+                    '''INSERT INTO transaction_items (reference, product_id, name, quantity, unit_price)
+                    VALUES (:reference, :product_id, :name, :quantity, :unit_price)''',
+                    items
+                )
+                OrderLedger.append_placed(db, orders)
+
+    @staticmethod
+    def record_events(events):
+        """Upsert a batch of webhook events in a single transaction.
+
+        Events are de-duplicated by reference. A reference that has reached
+        'success' or 'reversed' is never moved back, so redelivered or
+        out-of-order events are harmless. A reversal only applies to a
+        successful payment, and a refund only when it covers the whole
+        amount; others (early, unknown or partial) are dropped. Final
+        outcomes are appended to the order ledger in the same transaction.
+        """
+        outcomes = [event for event in events if event['status'] != 'reversed']
+        reversals = [dict(event, refund_amount=event.get('refund_amount'))
+                     for event in events if event['status'] == 'reversed']
+        db = get_db()
+        with db:
+            db.executemany('''
+            INSERT INTO transactions (reference, status, amount, currency, email, product_id, buyer_id, last_event, paid_at)
+            VALUES (:reference, :status, :amount, :currency, :email, :product_id, :buyer_id, :event, :paid_at)
+            ON CONFLICT (reference) DO UPDATE SET
+                status = excluded.status,
+                amount = COALESCE(excluded.amount, transactions.amount),
+                currency = COALESCE(excluded.currency, transactions.currency),
+                email = COALESCE(excluded.email, transactions.email),
+                product_id = COALESCE(transactions.product_id, excluded.product_id),
+                buyer_id = COALESCE(transactions.buyer_id, excluded.buyer_id),
+                last_event = excluded.last_event,
+                paid_at = COALESCE(excluded.paid_at, transactions.paid_at),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE transactions.status NOT IN ('success', 'reversed')
+            ''', outcomes)
+            db.executemany('''
+            UPDATE transactions SET status = 'reversed', last_event = :event, updated_at = CURRENT_TIMESTAMP
+            WHERE reference = :reference AND status = 'success'
+              AND (:refund_amount IS NULL OR :refund_amount >= amount)
+            ''', reversals)
+            OrderLedger.append_outcomes(db, events)
+
+    @staticmethod
+    def get_items(reference):
+        """Get the line items of a cart checkout"""
+        return get_db().execute(
+            'SELECT * FROM transaction_items WHERE reference = ? ORDER BY id', (reference,)
+        ).fetchall()
+
+    @staticmethod
+    def get_by_reference(reference):
+        """Get a transaction by its Paystack reference"""
+        db = get_db()
+        return db.execute('SELECT * FROM transactions WHERE reference = ?', (reference,)).fetchone()
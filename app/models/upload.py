@@ -0,0 +1,92 @@
+from .database import get_db
+
+class Upload:
+    """Reference-counted, content-addressed upload.
+
+    Every method runs inside an immediate (write-locked) transaction and
+    performs its filesystem change before committing, so a file can never
+    be removed by one request while another one is taking a reference on
+    the same content.
+    """
+
+    @staticmethod
+    def acquire(path, sha256, size, store_file):
+        """Take a reference on ``path``; ``store_file`` is called if this is the first one.
+
+        Returns the new reference count.
+        """
+        db = get_db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            refcount = db.execute('''
+            INSERT INTO uploads (path, sha256, size, refcount) VALUES (?, ?, ?, 1)
+            ON CONFLICT (path) DO UPDATE SET refcount = refcount + 1
+            RETURNING refcount
+            ''', (path, sha256, size)).fetchone()[0]
+            if refcount == 1:
+                store_file()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return refcount
+
+    @staticmethod
+    def acquire_many(db, uploads, store_file):
+        """Take one reference per ``(path, sha256, size)`` on the caller's connection.
+
+        The caller must hold the write lock (BEGIN IMMEDIATE) and commit,
+        so the references can share a transaction with the rows that use
+        them. ``store_file(path)`` is called for every path that had no
+        reference before. Returns those paths.
+        """
+        counts = {}
+        for path, sha256, size in uploads:
+            count, _, _ = counts.get(path, (0, sha256, size))
+            counts[path] = (count + 1, sha256, size)
+        stored = []
+        for path, (count, sha256, size) in counts.items():
+            refcount = db.execute('''
+            INSERT INTO uploads (path, sha256, size, refcount) VALUES (?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET refcount = refcount + excluded.refcount
+            RETURNING refcount
+            ''', (path, sha256, size, count)).fetchone()[0]
+            if refcount == count:
+                store_file(path)
+                stored.append(path)
+        return stored
+
+    @staticmethod
+    def release(path, remove_file):
+        """Drop a reference on ``path``; ``remove_file`` is called when none are left.
+
+        Returns the remaining reference count, or None if ``path`` is not a
+        tracked upload.
+        """
+        db = get_db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'UPDATE uploads SET refcount = refcount - 1 WHERE path = ? RETURNING refcount',
+                (path,)
+            ).fetchone()
+            if row is not None and row[0] <= 0:
+                db.execute('DELETE FROM uploads WHERE path = ?', (path,))
+                remove_file()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return None if row is None else max(row[0], 0)
+
+    @staticmethod
+    def mark_variants_ready(path):
+        """Record that the derivatives of ``path`` exist, on the upload and every product using it.
+
+        Products inserted later copy the flag from the upload, so the two
+        never disagree whichever commits first.
+        """
+        db = get_db()
+        with db:
+            db.execute('UPDATE uploads SET variants_ready = 1 WHERE path = ?', (path,))
+            db.execute('UPDATE products SET image_variants = 1 WHERE image_path = ? AND image_variants = 0', (path,))
@@ -0,0 +1,56 @@
+import time
+from .database import get_db
+
+class VerificationJob:
+    """Persistent queue of Paystack references waiting to be verified"""
+
+    @staticmethod
+    def enqueue(reference):
+        """Queue a reference for verification; returns False if already queued"""
+        db = get_db()
+        cursor = db.execute(
+            'INSERT OR IGNORE INTO verification_jobs (reference, next_attempt_at) VALUES (?, ?)',
+            (reference, time.time())
+        )
+        db.commit()
+        return cursor.rowcount == 1
+
+    @staticmethod
+    def claim(worker_id, limit, lease_seconds):
+        """Atomically claim up to ``limit`` due jobs.
+
+        Jobs whose lease has expired (their worker died mid-verification)
+        are claimed again. Returns a list of ``(reference, attempts)``.
+        """
+        now = time.time()
+        db = get_db()
+        rows = db.execute('''
+        UPDATE verification_jobs
+        SET status = 'running', claimed_by = ?, lease_expires_at = ?, attempts = attempts + 1
+        WHERE reference IN (
+            SELECT reference FROM verification_jobs
+            WHERE (status = 'pending' AND next_attempt_at <= ?)
+               OR (status = 'running' AND lease_expires_at < ?)
+            ORDER BY next_attempt_at
+            LIMIT ?
+        )
+        RETURNING reference, attempts
+        ''', (worker_id, now + lease_seconds, now, now, limit)).fetchall()
+        db.commit()
+        return [(row['reference'], row['attempts']) for row in rows]
+
+    @staticmethod
+    def finish(results):
+        """Store the outcome of a batch of claimed jobs.
+
+        ``results`` holds ``(reference, status, retry_at, error)`` tuples
+        where status is 'done', 'failed' or 'pending' (retry at retry_at).
+        """
+        db = get_db()
+        with db:
+            db.executemany('''
+            UPDATE verification_jobs
+            SET status = ?, next_attempt_at = COALESCE(?, next_attempt_at), last_error = ?,
+                claimed_by = NULL, lease_expires_at = NULL
+            WHERE reference = ?
+            ''', [(status, retry_at, error, reference) for reference, status, retry_at, error in results])
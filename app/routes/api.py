@@ -0,0 +1,118 @@
+import hashlib
+from flask import Blueprint, request, jsonify, current_app, session
+from app.models.ledger import OrderLedger
+from app.models.product import Product, API_FIELDS
+from app.utils.auth_decorators import get_user_type
+from app.utils.compression import encoded_etags
+from app.utils.pagination import encode_cursor, decode_cursor
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+def _error(message, status):
+    return jsonify({'error': message}), status
+
+def _parse_fields():
+    """Requested ?fields=a,b,c in API_FIELDS order; all fields if omitted, None if any is unknown"""
+    requested = request.args.get('fields')
+    if not requested:
+        return list(API_FIELDS)
+    names = {name.strip() for name in requested.split(',') if name.strip()}
+    if not names or names - API_FIELDS.keys():
+        return None
+    return [field for field in API_FIELDS if field in names]
+
+def _not_modified(etag, last_modified):
+    """Conditional GET check against the catalog version, before running any query.
+
+    A client that sends an ETag is answered from the ETag alone.
+    Last-Modified only has one-second resolution, so If-Modified-Since only
+    matches once it is past the second of the latest write: a client that
+    fetched earlier in that same second could have missed the write.
+    """
+    if request.if_none_match:
+        for candidate in encoded_etags(etag):
+            if request.if_none_match.contains(candidate):
+                return candidate
+        return None
+    if last_modified and request.if_modified_since and last_modified < request.if_modified_since:
+        return etag
+    return None
+
+def catalog_response(build_payload):
+    """JSON response validated by the catalog version.
+
+    The ETag is derived from the catalog version and the full request URL,
+    and Last-Modified from the time of the last product write, so an
+    unchanged catalog answers 304 without querying any products.
+    """
+    version, last_modified = Product.get_catalog_state()
+    etag = hashlib.sha1(f'{version}:{request.full_path}'.encode('utf-8')).hexdigest()
+    matched = _not_modified(etag, last_modified)
+    if matched:
+        response = current_app.response_class(status=304)
+        response.set_etag(matched)
+    else:
+        payload, status = build_payload()
+        response = jsonify(payload)
+        response.status_code = status
+        if status != 200:
+            return response
+        response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api.route('/products')
+def list_products():
+    fields = _parse_fields()
+    if fields is None:
+        return _error(f"Unknown field. Available fields: {', '.join(API_FIELDS)}", 400)
+    limit = request.args.get('limit', current_app.config['CATALOG_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+    raw_cursor = request.args.get('cursor')
+    cursor = decode_cursor(raw_cursor)
+    if raw_cursor and cursor is None:
+        return _error('Invalid cursor.', 400)
+    seller_id = request.args.get('seller_id', type=int)
+
+    def build_payload():
+        items, next_cursor = Product.get_fields_page(fields, limit, cursor=cursor, seller_id=seller_id)
+        return {'products': items, 'next_cursor': next_cursor}, 200
+    return catalog_response(build_payload)
+
+@api.route('/products/<int:product_id>')
+def get_product(product_id):
+    fields = _parse_fields()
+    if fields is None:
+        return _error(f"Unknown field. Available fields: {', '.join(API_FIELDS)}", 400)
+
+    def build_payload():
+        product = Product.get_fields_by_id(product_id, fields)
+        if product is None:
+            return {'error': 'Product not found.'}, 404
+        return product, 200
+    return catalog_response(build_payload)
+
+@api.route('/sales')
+def list_sales():
+    """The logged-in seller's paid order lines from the order ledger, newest first.
+
+    Totals are only computed for the first page.
+    """
+    if 'user_id' not in session:
+        return _error('Login required.', 401)
+    seller_id = session['user_id']
+    if get_user_type(seller_id) != 'seller':
+        return _error('Only sellers have sales.', 403)
+    limit = request.args.get('limit', current_app.config['CATALOG_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+    raw_cursor = request.args.get('cursor')
+    cursor = decode_cursor(raw_cursor, size=1)
+    if raw_cursor and (cursor is None or not isinstance(cursor[0], int)):
+        return _error('Invalid cursor.', 400)
+    sales, next_before_id = OrderLedger.get_sales(seller_id, limit, before_id=cursor[0] if cursor else None)
+    return jsonify({
+        'sales': sales,
+        'totals': OrderLedger.get_sales_totals(seller_id) if cursor is None else None,
+        'next_cursor': encode_cursor(next_before_id) if next_before_id is not None else None
+    })
@@ -0,0 +1,65 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from app.models.product import Product
+from app.utils.auth_decorators import buyer_required
+from app.utils.cart import add_to_cart, remove_from_cart, cart_summary, resolve_cart
+from app.utils.payment_utils import initialize_order_payment
+from app.utils.ledger import place_order
+
+cart = Blueprint('cart', __name__)
+
+def _wants_json():
+    return request.accept_mimetypes.best == 'application/json'
+
+def _cart_response(message, category='success', status=200):
+    """JSON for fetch() callers, a redirect back for plain form posts"""
+    if _wants_json():
+        return jsonify(dict(cart_summary(), message=message)), status
+    flash(message, category)
+    return redirect(request.referrer or url_for('cart.view_cart'))
+
+@cart.route('/cart')
+@buyer_required
+def view_cart():
+    items, total, missing = resolve_cart()
+    if missing:
+        flash('Some items in your cart are no longer available and were removed.', 'error')
+    return render_template('cart.html', items=items, total=total)
+
+@cart.route('/cart/add/<int:product_id>', methods=['POST'])
+@buyer_required
+def add_item(product_id):
+    if product_id not in Product.get_many([product_id]):
+        return _cart_response('Product not found!', 'error', 404)
+    quantity = request.form.get('quantity', 1, type=int)
+    if not add_to_cart(product_id, max(quantity, 1)):
+        return _cart_response('Your cart is full.', 'error', 409)
+    return _cart_response('Added to cart.')
+
+@cart.route('/cart/remove/<int:product_id>', methods=['POST'])
+@buyer_required
+def remove_item(product_id):
+    remove_from_cart(product_id)
+    return _cart_response('Removed from cart.')
+
+@cart.route('/cart/checkout', methods=['POST'])
+@buyer_required
+def checkout():
+    items, total, missing = resolve_cart(validate=True)
+    if missing:
+        flash('Some items in your cart are no longer available and were removed. Please review your order.', 'error')
+        return redirect(url_for('cart.view_cart'))
+    if not items:
+        flash('Your cart is empty.', 'error')
+        return redirect(url_for('cart.view_cart'))
+    email = request.form['email']
+    line_items = [{key: item[key] for key in ('product_id', 'seller_id', 'name', 'quantity', 'unit_price')} for item in items]
+    result = initialize_order_payment(line_items, email, buyer_id=session['user_id'])
+    if not result['success']:
+        flash('Payment initialization failed', 'error')
+        return redirect(url_for('cart.view_cart'))
+    if not place_order(result['reference'], result['amount'], email, line_items, buyer_id=session['user_id']):
+        flash('We could not place your order right now. Please try again.', 'error')
+        return redirect(url_for('cart.view_cart'))
+    # The cart is emptied when Paystack sends the buyer back for this reference
+    session['checkout_reference'] = result['reference']
+    return redirect(result['auth_url'])
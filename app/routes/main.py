@@ -1,20 +1,41 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
 from app.models.database import get_db_connection
+from app.models.product import Product
+from app.models.transaction import Transaction
+from app.utils.auth_decorators import remember_user_type
+from app.utils.cache import cached_catalog_page
+from app.utils.cart import clear_cart
+from app.utils.pagination import decode_cursor, CursorPage
+from app.utils.passwords import get_password_hasher, HashingOverloaded, RETRY_AFTER_SECONDS
+from app.utils.streaming import page_size, should_stream, render_streamed
+from app.utils.verification import request_verification, FINAL_STATUSES
 
 main = Blueprint('main', __name__)
 
+def _overloaded(template):
+    flash('We are receiving too many requests right now. Please try again in a moment.', 'error')
+    return render_template(template), 503, {'Retry-After': str(RETRY_AFTER_SECONDS)}
+
 @main.route('/')
+@cached_catalog_page
 def index():
-    conn = get_db_connection()
-    products = conn.execute('''
-        SELECT p.*, u.username as seller_name 
-        FROM products p 
-        JOIN users u ON p.seller_id = u.id 
-        ORDER BY p.created_at DESC
-    ''').fetchall()
-    conn.close()
-    return render_template('index.html', products=products)
+    cursor = decode_cursor(request.args.get('cursor'))
+    limit = page_size()
+    if should_stream(limit):
+        return render_streamed('index.html', products=Product.stream_page(limit, cursor=cursor), is_first_page=cursor is None)
+    products, next_cursor = Product.get_page(limit, cursor=cursor)
+    return render_template('index.html', products=CursorPage(products, next_cursor), is_first_page=cursor is None)
+
+@main.route('/search')
+@cached_catalog_page
+def search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return redirect(url_for('main.index'))
+    cursor = decode_cursor(request.args.get('cursor'))
+    products, next_cursor = Product.search(query, current_app.config['CATALOG_PAGE_SIZE'], cursor=cursor)
+    return render_template('index.html', products=CursorPage(products, next_cursor), is_first_page=cursor is None,
+                           query=query)
 
 @main.route('/register', methods=['GET', 'POST'])
 def register():
@@ -35,7 +56,11 @@ def register():
             flash('Username or email already exists.', 'error')
             conn.close()
             return render_template('register.html')
-        password_hash = generate_password_hash(password)
+        try:
+            password_hash = get_password_hasher().hash(password)
+        except HashingOverloaded:
+            conn.close()
+            return _overloaded('register.html')
         conn.execute('INSERT INTO users (username, email, password_hash, user_type) VALUES (?, ?, ?, ?)', (username, email, password_hash, user_type))
         conn.commit()
         conn.close()
@@ -51,16 +76,35 @@ def login():
         conn = get_db_connection()
         user = conn.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
         conn.close()
-        if user and check_password_hash(user['password_hash'], password):
+        hasher = get_password_hasher()
+        try:
+            valid = bool(user) and hasher.verify(user['password_hash'], password)
+        except HashingOverloaded:
+            return _overloaded('login.html')
+        if valid:
+            if hasher.needs_rehash(user['password_hash']):
+                _upgrade_password_hash(user['id'], password)
             session['user_id'] = user['id']
             session['username'] = user['username']
             session['user_type'] = user['user_type']
+            remember_user_type(user['id'], user['user_type'])
             flash(f'Welcome back, {user["username"]}!', 'success')
             return redirect(url_for('main.index'))
         else:
             flash('Invalid username or password.', 'error')
     return render_template('login.html')
 
+def _upgrade_password_hash(user_id, password):
+    """Re-hash a password with the configured cost after a successful login"""
+    try:
+        password_hash = get_password_hasher().hash(password)
+    except HashingOverloaded:
+        return  # Not urgent; try again on the next login
+    conn = get_db_connection()
+    conn.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
+    conn.commit()
+    conn.close()
+
 @main.route('/logout')
 def logout():
     session.clear()
@@ -69,4 +113,14 @@ def logout():
 
 @main.route('/payment-success')
 def payment_success():
-    return render_template('success.html') 
\ No newline at end of file
+    # Paystack appends ?reference=...&trxref=... to the callback URL
+    reference = request.args.get('reference') or request.args.get('trxref')
+    transaction = Transaction.get_by_reference(reference) if reference else None
+    if transaction is None:
+        return render_template('success.html')
+    if transaction['status'] not in FINAL_STATUSES:
+        request_verification(reference)
+    if session.get('checkout_reference') == reference and transaction['status'] not in ('failed', 'reversed'):
+        clear_cart()
+    return render_template('success.html', reference=reference, status=transaction['status'],
+                           items=Transaction.get_items(reference)) 
\ No newline at end of file
@@ -0,0 +1,11 @@
+from flask import Blueprint, request, current_app, abort
+from app.utils.metrics import collect_metrics
+
+metrics = Blueprint('metrics', __name__)
+
+@metrics.route('/metrics')
+def export_metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+    return current_app.response_class(collect_metrics(), mimetype='text/plain; version=0.0.4')
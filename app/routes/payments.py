@@ -1,42 +1,111 @@
-from flask import Blueprint, request, redirect, url_for, flash, session, current_app
-import requests
-import uuid
+import time
+from flask import Blueprint, request, redirect, url_for, flash, session, current_app, jsonify, render_template
 from app.utils.auth_decorators import login_required
-from app.models.database import get_db_connection
+from app.models.payment_attempt import PaymentAttempt
+from app.models.product import Product
+from app.models.transaction import Transaction
+from app.utils.payment_utils import initialize_payment, idempotency_key
+from app.utils.ledger import place_order
+from app.utils.webhooks import verify_signature, enqueue_event
+from app.utils.verification import wake_verification_worker, FINAL_STATUSES
 
 payments = Blueprint('payments', __name__)
 
 @payments.route('/pay/<int:product_id>', methods=['POST'])
 @login_required
 def pay(product_id):
-    conn = get_db_connection()
-    product = conn.execute('SELECT * FROM products WHERE id = ?', (product_id,)).fetchone()
-    conn.close()
+    product = Product.get_by_id(product_id, validate=True)
     if not product:
         flash('Product not found!', 'error')
         return redirect(url_for('main.index'))
-    email = request.form['email']
-    amount = int(product['price'] * 100)
-    headers = {
-        "Authorization": f"Bearer {current_app.config['PAYSTACK_SECRET_KEY']}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "email": email,
-        "amount": amount,
-        "reference": str(uuid.uuid4()),
-        "callback_url": current_app.config['CALLBACK_URL'],
-        "metadata": {
-            "product_id": product_id,
-            "product_name": product['name'],
-            "buyer_id": session['user_id']
-        }
-    }
-    response = requests.post("https://api.paystack.co/transaction/initialize", json=data, headers=headers)
-    res_data = response.json()
-    if res_data.get('status') is True:
-        auth_url = res_data['data']['authorization_url']
-        return redirect(auth_url)
-    else:
-        flash('Payment initialization failed', 'error')
-        return redirect(url_for('main.index')) 
\ No newline at end of file
+    email = request.form.get('email', '').strip()
+    if not email:
+        flash('Please enter your email address.', 'error')
+        return redirect(url_for('main.index'))
+    # A double-click or a retried submit of the same form carries the same nonce
+    key = idempotency_key(session['user_id'], product_id, request.form.get('nonce'))
+    if key is not None:
+        claimed, attempt = PaymentAttempt.claim(key, current_app.config['PAY_CLAIM_LEASE'])
+        if not claimed:
+            return _resume_attempt(key, attempt)
+    completed = False
+    try:
+        result = initialize_payment(product_id, product.name, product.price, email, buyer_id=session['user_id'])
+        if not result['success']:
+            flash('Payment initialization failed', 'error')
+            return redirect(url_for('main.index'))
+        items = [{
+            'product_id': product_id,
+            'seller_id': product.seller_id,
+            'name': product.name,
+            'quantity': 1,
+            'unit_price': product.price
+        }]
+        if not place_order(result['reference'], result['amount'], email, items,
+                           product_id=product_id, buyer_id=session['user_id']):
+            flash('We could not place your order right now. Please try again.', 'error')
+            return redirect(url_for('main.index'))
+        if key is not None:
+            PaymentAttempt.complete(key, result['reference'], result['auth_url'],
+                                    current_app.config['PAY_IDEMPOTENCY_TTL'])
+        completed = True
+    finally:
+        # Any failure, including an exception, frees the key so a retry starts afresh
+        if not completed:
+            _release(key)
+    return redirect(result['auth_url'])
+
+def _release(key):
+    if key is not None:
+        PaymentAttempt.release(key)
+
+def _resume_attempt(key, attempt, since=None):
+    """Answer a repeated submit from the first one's authorization, without calling Paystack.
+
+    While the first submit is still waiting on Paystack, the buyer gets a
+    page that checks back every second for up to PAY_IDEMPOTENCY_WAIT,
+    so no worker is held while it waits.
+    """
+    if attempt is None:
+        flash('Your previous payment attempt did not go through. Please try again.', 'error')
+        return redirect(url_for('main.index'))
+    if attempt['status'] == 'pending':
+        since = since or time.time()
+        if time.time() - since >= current_app.config['PAY_IDEMPOTENCY_WAIT']:
+            flash('Your payment is already being set up. Please wait a moment.', 'info')
+            return redirect(url_for('main.index'))
+        return render_template('payment_processing.html', refresh_after=1,
+                               refresh_url=url_for('payments.resume_payment', key=key, since=int(since)))
+    transaction = Transaction.get_by_reference(attempt['reference'])
+    if transaction is not None and transaction['status'] in FINAL_STATUSES:
+        return redirect(url_for('main.payment_success', reference=attempt['reference']))
+    return redirect(attempt['auth_url'])
+
+@payments.route('/pay/attempts/<key>')
+@login_required
+def resume_payment(key):
+    return _resume_attempt(key, PaymentAttempt.get(key), request.args.get('since', type=float))
+
+@payments.route('/paystack/webhook', methods=['POST'])
+def paystack_webhook():
+    payload = request.get_data()
+    signature = request.headers.get('X-Paystack-Signature')
+    if not verify_signature(payload, signature, current_app.config['PAYSTACK_SECRET_KEY']):
+        return '', 401
+    event = request.get_json(silent=True)
+    if not isinstance(event, dict):
+        return '', 400
+    if not enqueue_event(event):
+        # Queue is full: a non-2xx makes Paystack redeliver later
+        return '', 503
+    return '', 200
+
+@payments.route('/payment-status/<reference>')
+def payment_status(reference):
+    transaction = Transaction.get_by_reference(reference)
+    if transaction is None:
+        return jsonify({'error': 'Unknown reference'}), 404
+    final = transaction['status'] in FINAL_STATUSES
+    if not final:
+        wake_verification_worker()
+    return jsonify({'reference': reference, 'status': transaction['status'], 'final': final})
@@ -1,10 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.utils import secure_filename
-from datetime import datetime
-import os
 from app.utils.auth_decorators import login_required, seller_required
 from app.models.database import get_db_connection
-from app.utils.file_utils import allowed_file
+from app.models.product import Product, StaleProductError
+from app.utils.file_utils import save_uploaded_file, release_uploaded_file
+from app.utils.pagination import decode_cursor, CursorPage
+from app.utils.streaming import page_size, should_stream, render_streamed
 
 products = Blueprint('products', __name__)
 
@@ -18,14 +18,7 @@ def add_product():
         price = float(request.form['price'])
         image_path = None
         if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"{timestamp}_{filename}"
-                filepath = os.path.join('static/uploads', filename)
-                file.save(filepath)
-                image_path = f"uploads/{filename}"
+            image_path = save_uploaded_file(request.files['image'])
         conn = get_db_connection()
         conn.execute('INSERT INTO products (name, description, price, image_path, seller_id) VALUES (?, ?, ?, ?, ?)', (name, description, price, image_path, session['user_id']))
         conn.commit()
@@ -38,58 +31,57 @@ def add_product():
 @login_required
 @seller_required
 def manage_products():
-    conn = get_db_connection()
-    products = conn.execute('SELECT * FROM products WHERE seller_id = ? ORDER BY created_at DESC', (session['user_id'],)).fetchall()
-    conn.close()
-    return render_template('manage_products.html', products=products)
+    cursor = decode_cursor(request.args.get('cursor'))
+    limit = page_size()
+    stats = Product.get_stats(seller_id=session['user_id'])
+    if should_stream(limit):
+        products = Product.stream_page(limit, cursor=cursor, seller_id=session['user_id'])
+        return render_streamed('manage_products.html', products=products, stats=stats, is_first_page=cursor is None)
+    products, next_cursor = Product.get_page(limit, cursor=cursor, seller_id=session['user_id'])
+    return render_template('manage_products.html', products=CursorPage(products, next_cursor), stats=stats,
+                           is_first_page=cursor is None)
 
 @products.route('/edit-product/<int:product_id>', methods=['GET', 'POST'])
 @login_required
 @seller_required
 def edit_product(product_id):
-    conn = get_db_connection()
-    product = conn.execute('SELECT * FROM products WHERE id = ? AND seller_id = ?', (product_id, session['user_id'])).fetchone()
-    if not product:
+    product = Product.get_by_id(product_id)
+    if not product or product.seller_id != session['user_id']:
         flash('Product not found or you do not have permission to edit it.', 'error')
         return redirect(url_for('products.manage_products'))
     if request.method == 'POST':
-        name = request.form['name']
-        description = request.form['description']
-        price = float(request.form['price'])
-        image_path = product['image_path']
+        # Save against the version the form was rendered from, so concurrent edits are not lost
+        edited = Product(id=product.id, name=request.form['name'], description=request.form['description'],
+                         price=float(request.form['price']), image_path=product.image_path,
+                         seller_id=product.seller_id, version=request.form.get('version', product.version, type=int))
+        replaced_image = None
         if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"{timestamp}_{filename}"
-                filepath = os.path.join('static/uploads', filename)
-                file.save(filepath)
-                image_path = f"uploads/{filename}"
-        conn.execute('UPDATE products SET name = ?, description = ?, price = ?, image_path = ? WHERE id = ? AND seller_id = ?', (name, description, price, image_path, product_id, session['user_id']))
-        conn.commit()
-        conn.close()
+            uploaded = save_uploaded_file(request.files['image'])
+            if uploaded:
+                replaced_image, edited.image_path = edited.image_path, uploaded
+        try:
+            edited.save()
+        except StaleProductError:
+            if replaced_image:
+                release_uploaded_file(edited.image_path)
+            flash('This product was changed elsewhere while you were editing. Review the latest details and save again.', 'error')
+            return redirect(url_for('products.edit_product', product_id=product_id))
+        if replaced_image:
+            release_uploaded_file(replaced_image)
         flash('Product updated successfully!', 'success')
         return redirect(url_for('products.manage_products'))
-    conn.close()
     return render_template('edit_product.html', product=product)
 
 @products.route('/delete-product/<int:product_id>')
 @login_required
 @seller_required
 def delete_product(product_id):
-    conn = get_db_connection()
-    product = conn.execute('SELECT * FROM products WHERE id = ? AND seller_id = ?', (product_id, session['user_id'])).fetchone()
-    if not product:
+    product = Product.get_by_id(product_id)
+    if not product or product.seller_id != session['user_id']:
         flash('Product not found or you do not have permission to delete it.', 'error')
         return redirect(url_for('products.manage_products'))
-    if product['image_path']:
-        try:
-            os.remove(os.path.join('static', product['image_path']))
-        except:
-            pass
-    conn.execute('DELETE FROM products WHERE id = ? AND seller_id = ?', (product_id, session['user_id']))
-    conn.commit()
-    conn.close()
+    product.delete()
+    if product.image_path:
+        release_uploaded_file(product.image_path)
     flash('Product deleted successfully!', 'success')
     return redirect(url_for('products.manage_products')) 
\ No newline at end of file
@@ -56,9 +56,9 @@ function initializeDragAndDrop() {
 }
 
 // Delete Confirmation Function
-function confirmDelete(productId, productName) {
+function confirmDelete(deleteUrl, productName) {
     document.getElementById('productName').textContent = productName;
-    document.getElementById('confirmDelete').href = `/delete-product/${productId}`;
+    document.getElementById('confirmDelete').href = deleteUrl;
     
     const modal = new bootstrap.Modal(document.getElementById('deleteModal'));
     modal.show();
@@ -83,13 +83,135 @@ function createConfetti() {
     }
 }
 
+// Payment Status Polling for Success Page
+function showPaymentState(container, state) {
+    container.dataset.state = state;
+    container.querySelectorAll('[data-payment-state]').forEach((el) => {
+        el.classList.toggle('d-none', el.dataset.paymentState !== state);
+    });
+    if (state === 'success') {
+        createConfetti();
+    }
+}
+
+function pollPaymentStatus(container, delay) {
+    setTimeout(() => {
+        fetch(container.dataset.statusUrl, { headers: { 'Accept': 'application/json' } })
+            .then((response) => response.json())
+            .then((data) => {
+                if (!data.final) {
+                    pollPaymentStatus(container, Math.min(delay * 1.5, 10000));
+                } else {
+                    showPaymentState(container, data.status === 'success' ? 'success' : 'failed');
+                }
+            })
+            .catch(() => pollPaymentStatus(container, Math.min(delay * 2, 10000)));
+    }, delay);
+}
+
+// Cart: add/remove items without reloading the page
+function updateCartCount(count) {
+    const badge = document.getElementById('cartCount');
+    if (badge) {
+        badge.textContent = count;
+    }
+}
+
+function submitCartForm(form) {
+    return fetch(form.action, {
+        method: 'POST',
+        body: new FormData(form),
+        headers: { 'Accept': 'application/json' }
+    }).then((response) => response.json().then((data) => {
+        if (!response.ok) {
+            throw new Error(data.message);
+        }
+        updateCartCount(data.count);
+        return data;
+    }));
+}
+
+function addToCart(form) {
+    const button = form.querySelector('button');
+    button.disabled = true;
+    submitCartForm(form)
+        .then(() => {
+            button.classList.add('added');
+            button.innerHTML = '<i class="fas fa-check"></i> Added';
+        })
+        .catch((error) => alert(error.message || 'Could not add to cart'))
+        .finally(() => { button.disabled = false; });
+}
+
+function removeFromCart(form) {
+    submitCartForm(form)
+        .then((data) => {
+            if (data.lines === 0) {
+                window.location.reload();
+                return;
+            }
+            form.closest('[data-cart-line]').remove();
+            let total = 0;
+            document.querySelectorAll('[data-cart-line]').forEach((line) => {
+                total += parseFloat(line.dataset.lineTotal);
+            });
+            document.getElementById('cartTotal').textContent = total.toFixed(2);
+        })
+        .catch((error) => alert(error.message || 'Could not remove item'));
+}
+
+function initializeCartForms() {
+    document.querySelectorAll('form[data-cart-add]').forEach((form) => {
+        form.addEventListener('submit', (e) => {
+            e.preventDefault();
+            addToCart(form);
+        });
+    });
+    document.querySelectorAll('form[data-cart-remove]').forEach((form) => {
+        form.addEventListener('submit', (e) => {
+            e.preventDefault();
+            removeFromCart(form);
+        });
+    });
+}
+
 // Initialize functions when DOM is loaded
+function randomNonce() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    const bytes = new Uint8Array(16);
+    crypto.getRandomValues(bytes);
+    return Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+function initializePayForms() {
+    // One nonce per page load: resubmitting the same form (double-click, back
+    // button, retry on a flaky connection) reuses the first payment attempt
+    document.querySelectorAll('form[data-pay-form] input[name="nonce"]').forEach((input) => {
+        if (!input.value) {
+            input.value = randomNonce();
+        }
+    });
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     // Initialize drag and drop for file uploads
     initializeDragAndDrop();
+
+    // Add to cart / remove from cart without a full page reload
+    initializeCartForms();
+
+    // Idempotency nonces for the pay forms
+    initializePayForms();
     
-    // Initialize confetti for success page
-    if (document.querySelector('.success-container')) {
-        createConfetti();
+    // Initialize confetti for success page, or wait for the payment to be confirmed
+    const successContainer = document.querySelector('.success-container');
+    if (successContainer) {
+        if (successContainer.dataset.state === 'pending' && successContainer.dataset.statusUrl) {
+            pollPaymentStatus(successContainer, 1000);
+        } else if (successContainer.dataset.state === 'success') {
+            createConfetti();
+        }
     }
 }); 
\ No newline at end of file
@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import with_appcontext
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional: gzip is still produced and served
+    brotli = None
+
+# Fingerprinted copies live under static/dist/
+DIST_FOLDER = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ASSET_EXTENSIONS = ('.css', '.js', '.svg')
+# Directories under static/ that hold user content, not build inputs
+SKIP_FOLDERS = {DIST_FOLDER, 'uploads'}
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Precompressed siblings, in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+def iter_sources(static_folder):
+    """Yield static asset paths (relative, with / separators) to fingerprint"""
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        if rel_root == '.':
+            dirs[:] = [d for d in dirs if d not in SKIP_FOLDERS]
+        for name in sorted(files):
+            if name.endswith(ASSET_EXTENSIONS):
+                yield os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, '/')
+
+def build_assets(static_folder):
+    """Write fingerprinted, precompressed copies of every asset and a manifest.
+
+    ``style.css`` becomes ``dist/style.<hash>.css`` plus ``.gz`` and
+    ``.br`` siblings. Builds are reproducible: unchanged sources produce
+    byte-identical output. Returns the manifest mapping.
+    """
+    manifest = {}
+    for source in iter_sources(static_folder):
+        with open(os.path.join(static_folder, source), 'rb') as f:
+            content = f.read()
+        stem, ext = os.path.splitext(source)
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        target = f"{DIST_FOLDER}/{stem}.{digest}{ext}"
+        target_path = os.path.join(static_folder, target)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with open(target_path, 'wb') as f:
+            f.write(content)
+        with open(f"{target_path}.gz", 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(f"{target_path}.br", 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+        manifest[source] = target
+
+    manifest_path = os.path.join(static_folder, DIST_FOLDER, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def load_manifest(static_folder):
+    """Load the asset manifest, or an empty one if assets were never built"""
+    try:
+        with open(os.path.join(static_folder, DIST_FOLDER, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def fingerprint_static_urls(endpoint, values):
+    """Make url_for('static', filename=...) point at the fingerprinted copy"""
+    if endpoint == 'static' and 'filename' in values:
+        manifest = current_app.extensions['asset_manifest']
+        values['filename'] = manifest.get(values['filename'], values['filename'])
+
+def precompressed_static(static_view):
+    """Wrap the static view to serve .br/.gz siblings negotiated from Accept-Encoding"""
+    def serve_static(filename):
+        if filename.startswith(f"{DIST_FOLDER}/"):
+            response = None
+            for encoding, suffix in PRECOMPRESSED:
+                if request.accept_encodings[encoding] and \
+                        os.path.isfile(os.path.join(current_app.static_folder, filename + suffix)):
+                    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                    response = send_from_directory(current_app.static_folder, filename + suffix, mimetype=mimetype)
+                    response.headers['Content-Encoding'] = encoding
+                    break
+            if response is None:
+                response = static_view(filename=filename)
+            response.vary.add('Accept-Encoding')
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+            return response
+        return static_view(filename=filename)
+    return serve_static
+
+@click.group('assets')
+def assets_cli():
+    """Static asset commands."""
+
+@assets_cli.command('build')
+@with_appcontext
+def build_command():
+    """Fingerprint and precompress static assets."""
+    manifest = build_assets(current_app.static_folder)
+    for source, target in sorted(manifest.items()):
+        click.echo(f'{source} -> {target}')
+    if brotli is None:
+        click.echo('Brotli is not installed; only .gz files were written.')
+
+def init_app(app):
+    """Initialize app with fingerprinted, precompressed static assets"""
+    manifest = load_manifest(app.static_folder) if app.config['USE_ASSET_MANIFEST'] else {}
+    app.extensions['asset_manifest'] = manifest
+    app.url_defaults(fingerprint_static_urls)
+    app.view_functions['static'] = precompressed_static(app.view_functions['static'])
+    app.cli.add_command(assets_cli)
@@ -1,13 +1,36 @@
 from functools import wraps
-from flask import session, flash, redirect, url_for
+from flask import session, flash, redirect, url_for, current_app
 from app.models.database import get_db
+from app.utils.cache import ResponseCache
+
+# Cached marker for "no such user", since the cache returns None on a miss
+_NO_USER = ''
+
+def get_user_type(user_id):
+    """Get a user's type through the per-worker role cache.
+
+    Nothing in the app changes a user's type or deletes a user, so cached
+    roles are never invalidated. A change made directly in the database
+    is seen by each worker within ROLE_CACHE_TTL.
+    """
+    cache = current_app.extensions['role_cache']
+    user_type = cache.get(user_id)
+    if user_type is None:
+        user = get_db().execute('SELECT user_type FROM users WHERE id = ?', (user_id,)).fetchone()
+        user_type = user['user_type'] if user else _NO_USER
+        cache.set(user_id, user_type)
+    return user_type or None
+
+def remember_user_type(user_id, user_type):
+    """Prime the role cache with a value that was just read or written"""
+    current_app.extensions['role_cache'].set(user_id, user_type)
 
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             flash('Please log in to access this page.', 'error')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -16,12 +39,28 @@ def seller_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             flash('Please log in to access this page.', 'error')
-            return redirect(url_for('login'))
-        conn = get_db()
-        user = conn.execute('SELECT * FROM users WHERE id = ?', (session['user_id'],)).fetchone()
-        conn.close()
-        if not user or user['user_type'] != 'seller':
+            return redirect(url_for('main.login'))
+        if get_user_type(session['user_id']) != 'seller':
             flash('You need to be a seller to access this page.', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         return f(*args, **kwargs)
-    return decorated_function 
\ No newline at end of file
+    return decorated_function
+
+def buyer_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('Please log in to access this page.', 'error')
+            return redirect(url_for('main.login'))
+        if get_user_type(session['user_id']) != 'buyer':
+            flash('Only buyers can purchase products.', 'error')
+            return redirect(url_for('main.index'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+def init_app(app):
+    """Initialize app with the role cache"""
+    app.extensions['role_cache'] = ResponseCache(
+        max_entries=app.config['ROLE_CACHE_SIZE'],
+        ttl=app.config['ROLE_CACHE_TTL']
+    )
@@ -0,0 +1,137 @@
+import atexit
+import os
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+import queue
+import threading
+import time
+
+_STOP = object()
+
+class BatchWriter:
+    """Background thread that drains a bounded queue and writes items in batches.
+
+    ``handler`` is called inside an app context with a list of up to
+    ``max_batch`` items, collected for at most ``max_delay`` seconds after
+    the first one arrives. submit() never blocks: it returns False when the
+    queue is full so the caller can shed load. write() also waits until the
+    batch holding the item has been committed, so many concurrent callers
+    share one commit (group commit) while each still learns that its own
+    item is stored. The thread is started lazily in each worker process and
+    drained at interpreter exit.
+    """
+
+    def __init__(self, app, handler, max_batch=200, max_delay=0.05, max_queue=10000, retries=2, name='batch-writer'):
+        self.app = app
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.retries = retries
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # A forked child inherits the queue object but not the thread
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                atexit.register(self.stop)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def submit(self, item):
+        """Queue an item for writing; returns False if the queue is full"""
+        return self._put(item, None)
+
+    def write(self, item, timeout=None):
+        """Queue an item and wait until the batch holding it is committed.
+
+        Returns False if the queue is full, the write failed or it was not
+        acknowledged within ``timeout`` seconds. After a timeout the item
+        may still be written later.
+        """
+        ack = Future()
+        if not self._put(item, ack):
+            return False
+        try:
+            return ack.result(timeout)
+        except FutureTimeout:
+            return False
+
+    def _put(self, item, ack):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((item, ack))
+        except queue.Full:
+            return False
+        return True
+
+    def _collect(self):
+        item = self._queue.get()
+        if item is _STOP:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _write(self, batch, retries):
+        for attempt in range(retries + 1):
+            try:
+                with self.app.app_context():
+                    self.handler([item for item, _ in batch])
+                return True
+            except Exception:
+                if attempt == retries:
+                    self.app.logger.exception('%s could not write %d items', self.name, len(batch))
+                else:
+                    time.sleep(0.1 * (attempt + 1))
+        return False
+
+    def _write_batch(self, batch):
+        if self._write(batch, self.retries):
+            written = batch
+        elif len(batch) > 1:
+            # Isolate the item that keeps failing so the rest of the batch is still stored
+            written = [entry for entry in batch if self._write([entry], 0)]
+        else:
+            written = []
+        if len(written) < len(batch):
+            self.app.logger.error('%s dropped %d of %d items', self.name, len(batch) - len(written), len(batch))
+        stored = {id(entry) for entry in written}
+        for entry in batch:
+            ack = entry[1]
+            if ack is not None:
+                ack.set_result(id(entry) in stored)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._write_batch(batch)
+
+    def stop(self, timeout=5):
+        """Write everything still queued, then stop the thread"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from flask import current_app, request, session
+from app.models.product import Product
+
+CachedPage = namedtuple('CachedPage', ['body', 'mimetype', 'etag'])
+
+class ResponseCache:
+    """Thread-safe LRU cache with a per-entry TTL and a bounded size"""
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get a live entry, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store an entry, evicting the least recently used ones if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Drop a single entry if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+def _is_shared_page():
+    """Anonymous visitors with no pending flash messages all see the same page"""
+    return request.method == 'GET' and 'user_id' not in session and '_flashes' not in session
+
+def _conditional(response):
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def cached_catalog_page(view):
+    """Serve a catalog page from the response cache, with a strong ETag.
+
+    Pages are keyed on the URL and the catalog version, so any product
+    write makes every cached page stale immediately. Only pages shared by
+    all anonymous visitors are cached; personalised pages still get an
+    ETag so browsers can revalidate them cheaply.
+    """
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        if not _is_shared_page():
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                response.add_etag()
+                response = _conditional(response)
+            return response
+
+        cache = current_app.extensions['catalog_cache']
+        key = (request.path, request.query_string, Product.get_catalog_version())
+        page = cache.get(key)
+        if page is None:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            response.add_etag()
+            page = CachedPage(response.get_data(), response.mimetype, response.get_etag()[0])
+            cache.set(key, page)
+
+        response = current_app.response_class(page.body, mimetype=page.mimetype)
+        response.set_etag(page.etag)
+        return _conditional(response)
+    return decorated_function
+
+def init_app(app):
+    """Initialize app with the catalog page cache and the product identity map"""
+    app.extensions['catalog_cache'] = ResponseCache(
+        max_entries=app.config['CATALOG_CACHE_SIZE'],
+        ttl=app.config['CATALOG_CACHE_TTL']
+    )
+    if app.config['PRODUCT_CACHE_SIZE'] > 0:
+        app.extensions['product_cache'] = ResponseCache(
+            max_entries=app.config['PRODUCT_CACHE_SIZE'],
+            ttl=app.config['PRODUCT_CACHE_TTL']
+        )
@@ -0,0 +1,76 @@
+from flask import session
+from app.models.product import Product
+
+# Limits that keep the cart small enough for the signed session cookie
+MAX_CART_LINES = 50
+MAX_QUANTITY = 99
+
+def get_cart():
+    """The session cart as ``{product_id: quantity}``"""
+    return {int(product_id): quantity for product_id, quantity in session.get('cart', {}).items()}
+
+def _save_cart(cart):
+    # Session data is JSON, so keys are stored as strings
+    session['cart'] = {str(product_id): quantity for product_id, quantity in cart.items()}
+
+def add_to_cart(product_id, quantity=1):
+    """Add ``quantity`` of a product; returns False if the cart is full"""
+    cart = get_cart()
+    if product_id not in cart and len(cart) >= MAX_CART_LINES:
+        return False
+    cart[product_id] = max(1, min(cart.get(product_id, 0) + quantity, MAX_QUANTITY))
+    _save_cart(cart)
+    return True
+
+def remove_from_cart(product_id):
+    """Remove a product's line from the cart"""
+    cart = get_cart()
+    cart.pop(product_id, None)
+    _save_cart(cart)
+
+def clear_cart():
+    session.pop('cart', None)
+    session.pop('checkout_reference', None)
+
+def cart_count():
+    """Total number of units in the cart"""
+    return sum(session.get('cart', {}).values())
+
+def cart_summary():
+    """Counts returned to the add/remove endpoints"""
+    return {'count': cart_count(), 'lines': len(session.get('cart', {}))}
+
+def resolve_cart(validate=False):
+    """Price the cart; returns ``(items, total, missing_ids)``.
+
+    Products that no longer exist are dropped from the cart and reported.
+    Pass ``validate=True`` to price from current rows rather than the
+    identity map (see Product.get_many).
+    """
+    cart = get_cart()
+    products = Product.get_many(cart, validate=validate)
+    missing = [product_id for product_id in cart if product_id not in products]
+    if missing:
+        for product_id in missing:
+            cart.pop(product_id)
+        _save_cart(cart)
+    items = [
+        {
+            'product_id': product_id,
+            'seller_id': products[product_id].seller_id,
+            'name': products[product_id].name,
+            'quantity': quantity,
+            'unit_price': products[product_id].price,
+            'image_path': products[product_id].image_path
+        }
+        for product_id, quantity in cart.items()
+    ]
+    total = round(sum(item['unit_price'] * item['quantity'] for item in items), 2)
+    return items, total, missing
+
+def inject_cart_count():
+    return {'cart_count': cart_count() if 'user_id' in session else 0}
+
+def init_app(app):
+    """Initialize app with the session cart"""
+    app.context_processor(inject_cart_count)
@@ -0,0 +1,255 @@
+import csv
+import json
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.models.database import get_db
+from app.models.product import Product
+from app.models.upload import Upload
+from app.utils.file_utils import spool_stream, content_paths
+from app.utils.images import process_upload
+
+EXPORT_FIELDS = ('id', 'name', 'description', 'price', 'image', 'seller', 'created_at')
+MAX_NAME_LENGTH = 200
+# Report at most this many rejected rows individually
+MAX_REPORTED_ERRORS = 20
+
+class RowError(ValueError):
+    """A row of an import file that cannot be loaded"""
+
+def detect_format(filename, fmt):
+    """Use the explicit format, else infer csv/jsonl from the file extension"""
+    if fmt:
+        return fmt
+    if filename.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if filename.endswith('.csv'):
+        return 'csv'
+    raise click.UsageError('Cannot infer the format from the file name; pass --format.')
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, record)`` from a CSV or JSONL stream, one record at a time"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, RowError(f'invalid JSON: {e}')
+            continue
+        yield line_number, record if isinstance(record, dict) else RowError('expected a JSON object')
+
+def validate_row(record, image_root, allowed_extensions):
+    """Check one record and return ``(name, description, price, image_file)``"""
+    if isinstance(record, RowError):
+        raise record
+    name = str(record.get('name') or '').strip()
+    if not name:
+        raise RowError('name is required')
+    if len(name) > MAX_NAME_LENGTH:
+        raise RowError(f'name is longer than {MAX_NAME_LENGTH} characters')
+    try:
+        price = float(record.get('price'))
+    except (TypeError, ValueError):
+        raise RowError(f"invalid price {record.get('price')!r}") from None
+    if not math.isfinite(price) or price < 0:
+        raise RowError(f'invalid price {price!r}')
+    description = str(record.get('description') or '').strip() or None
+
+    image_file = None
+    image = str(record.get('image') or '').strip()
+    if image:
+        extension = image.rsplit('.', 1)[-1].lower() if '.' in image else ''
+        if extension not in allowed_extensions:
+            raise RowError(f'image {image!r} does not have an allowed extension')
+        image_file = os.path.join(image_root, image)
+        if not os.path.isfile(image_file):
+            raise RowError(f'image {image!r} not found')
+    return name, description, round(price, 2), image_file
+
+def _spool_images(image_files, workers):
+    """Copy and hash local image files in parallel into the upload folder"""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+
+    def spool(image_file):
+        with open(image_file, 'rb') as stream:
+            return spool_stream(stream, upload_folder)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(image_files, executor.map(spool, image_files)))
+
+def import_batch(rows, seller_id, workers=8):
+    """Store the images of validated rows and insert the rows, all in one transaction.
+
+    Images are copied and hashed in parallel first. Their upload references
+    and the product rows are then written under one write lock, and new
+    content is moved into place before the commit, so the whole chunk costs
+    a single commit and a failure leaves neither rows nor references.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    spooled = _spool_images(sorted({row[3] for row in rows if row[3]}), workers)
+    try:
+        sources = {}
+        uploads = []
+        image_paths = []
+        for _, _, _, image_file in rows:
+            if image_file is None:
+                image_paths.append(None)
+                continue
+            tmp_path, sha256, size = spooled[image_file]
+            filepath, image_path = content_paths(sha256, image_file.rsplit('.', 1)[-1].lower(), upload_folder)
+            sources.setdefault(image_path, (tmp_path, filepath))
+            uploads.append((image_path, sha256, size))
+            image_paths.append(image_path)
+
+        created = []
+
+        def store_file(image_path):
+            tmp_path, filepath = sources[image_path]
+            if not os.path.exists(filepath):
+                os.replace(tmp_path, filepath)
+                created.append(image_path)
+
+        db = get_db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            Upload.acquire_many(db, uploads, store_file)
+            Product.insert_rows(db, [
+                (name, description, price, image_path, seller_id)
+                for (name, description, price, _), image_path in zip(rows, image_paths)
+            ])
+            db.commit()
+        except BaseException:
+            db.rollback()
+            for image_path in created:
+                os.remove(sources[image_path][1])
+            raise
+    finally:
+        for tmp_path, _, _ in spooled.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    # Derivatives are only generated for content that is new on disk
+    for image_path in created:
+        process_upload(image_path)
+    return len(rows)
+
+def get_seller_id(username):
+    """Resolve a seller's username to their user id"""
+    user = get_db().execute('SELECT id, user_type FROM users WHERE username = ?', (username,)).fetchone()
+    if user is None:
+        raise click.BadParameter(f'no user named {username!r}', param_hint='--seller')
+    if user['user_type'] != 'seller':
+        raise click.BadParameter(f'{username!r} is not a seller', param_hint='--seller')
+    return user['id']
+
+@click.group('products')
+def products_cli():
+    """Product catalog commands."""
+
+@products_cli.command('import')
+@click.argument('source', type=click.Path(dir_okay=False, allow_dash=True))
+@click.option('--seller', required=True, help='Username of the seller who will own the products.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--image-root', type=click.Path(file_okay=False, exists=True),
+              help='Directory image paths are relative to (default: the directory of SOURCE).')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows per transaction.')
+@click.option('--workers', default=8, show_default=True, help='Threads copying images.')
+@with_appcontext
+def import_command(source, seller, fmt, image_root, batch_size, workers):
+    """Import products from a CSV or JSONL file ('-' for stdin).
+
+    Columns: name, price, and optionally description and image (a local
+    file path). Invalid rows are reported and skipped.
+    """
+    seller_id = get_seller_id(seller)
+    fmt = detect_format(source, fmt)
+    if image_root is None:
+        image_root = os.getcwd() if source == '-' else os.path.dirname(os.path.abspath(source))
+    allowed_extensions = current_app.config['ALLOWED_EXTENSIONS']
+
+    imported = rejected = 0
+    stream = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8', newline='')
+    try:
+        records = read_rows(stream, fmt)
+        while True:
+            chunk = list(islice(records, batch_size))
+            if not chunk:
+                break
+            batch = []
+            for line_number, record in chunk:
+                try:
+                    batch.append(validate_row(record, image_root, allowed_extensions))
+                except RowError as e:
+                    rejected += 1
+                    if rejected <= MAX_REPORTED_ERRORS:
+                        click.echo(f'line {line_number}: {e}', err=True)
+            if batch:
+                imported += import_batch(batch, seller_id, workers)
+                click.echo(f'{imported} imported', err=True)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    click.echo(f'Imported {imported} products for {seller}; {rejected} rows rejected.')
+
+@products_cli.command('export')
+@click.argument('destination', type=click.Path(dir_okay=False, allow_dash=True))
+@click.option('--seller', help='Only export this seller\'s products.')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows fetched per round trip.')
+@with_appcontext
+def export_command(destination, seller, fmt, batch_size):
+    """Export products to a CSV or JSONL file ('-' for stdout), streaming row by row.
+
+    Image paths are relative to the static folder, so the file can be
+    re-imported with --image-root pointing there.
+    """
+    seller_id = get_seller_id(seller) if seller else None
+    fmt = detect_format(destination, fmt)
+    stream = sys.stdout if destination == '-' else open(destination, 'w', encoding='utf-8', newline='')
+    exported = 0
+    try:
+        writer = csv.DictWriter(stream, fieldnames=EXPORT_FIELDS) if fmt == 'csv' else None
+        if writer:
+            writer.writeheader()
+        for row in Product.iter_export(seller_id=seller_id, batch_size=batch_size):
+            record = {
+                'id': row['id'],
+                'name': row['name'],
+                'description': row['description'],
+                'price': row['price'],
+                'image': row['image_path'],
+                'seller': row['seller_name'],
+                'created_at': row['created_at']
+            }
+            if writer:
+                writer.writerow(record)
+            else:
+                stream.write(json.dumps(record) + '\n')
+            exported += 1
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    click.echo(f'Exported {exported} products.', err=True)
+
+@products_cli.command('rebuild-stats')
+@with_appcontext
+def rebuild_stats_command():
+    """Recompute the materialized product statistics."""
+    sellers = Product.rebuild_stats()
+    stats = Product.get_stats()
+    click.echo(f"Rebuilt stats for {sellers} sellers: {stats['total_products']} products, "
+               f"{stats['products_with_images']} with images, total value {stats['total_value']:.2f}")
+
+def init_app(app):
+    """Initialize app with catalog maintenance commands"""
+    app.cli.add_command(products_cli)
@@ -0,0 +1,73 @@
+import gzip
+from flask import current_app, request
+from app.utils.cache import ResponseCache
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional: responses fall back to gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'text/html', 'text/css', 'text/plain', 'application/json', 'application/javascript'}
+# Bodies smaller than this are not worth the CPU or the extra header
+MIN_COMPRESS_SIZE = 500
+
+def _choose_encoding():
+    if brotli is not None and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        # Quality 5 is close to gzip -9 in size at a fraction of the CPU cost
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+def encoded_etags(etag):
+    """Every ETag a response may carry once compressed: identity, br and gzip"""
+    return [etag, f'{etag}-br', f'{etag}-gzip']
+
+def compress_response(response):
+    """Compress dynamic text responses according to Accept-Encoding.
+
+    Strong ETags get an encoding suffix, since the compressed bytes differ
+    from the identity ones. Compressed bodies of ETagged responses are
+    memoised, so a cached catalog page is only compressed once.
+    """
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    compressed_bodies = current_app.extensions['compressed_bodies']
+    body = compressed_bodies.get((etag, encoding)) if etag else None
+    if body is None:
+        body = _compress(data, encoding)
+        if etag:
+            compressed_bodies.set((etag, encoding), body)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_app(app):
+    """Initialize app with response compression"""
+    app.extensions['compressed_bodies'] = ResponseCache(
+        max_entries=app.config['CATALOG_CACHE_SIZE'] * 2,
+        ttl=app.config['CATALOG_CACHE_TTL']
+    )
+    app.after_request(compress_response)
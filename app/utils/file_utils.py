@@ -1,40 +1,117 @@
 import os
-from datetime import datetime
-from werkzeug.utils import secure_filename
-from flask import current_app
+import re
+import hashlib
+import tempfile
+from flask import current_app, request
+from app.models.upload import Upload
+from app.utils.images import process_upload, delete_variants, static_path
+
+# Read uploads in 64 KiB chunks while hashing them
+CHUNK_SIZE = 64 * 1024
+# uploads/<sha256>.<ext> and its derivatives uploads/<sha256>.<variant>.<ext>
+CONTENT_ADDRESSED_PATH = re.compile(r'^uploads/[0-9a-f]{64}(\.[a-z]+)?\.[a-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
+def spool_stream(stream, upload_folder):
+    """Copy a stream to a temporary file in ``upload_folder`` while hashing it.
+
+    Returns ``(tmp_path, sha256, size)``; the caller must store or remove
+    the temporary file.
+    """
+    os.makedirs(upload_folder, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, hasher.hexdigest(), size
+
+def content_paths(sha256, extension, upload_folder):
+    """``(filepath, image_path)`` of content stored under its hash"""
+    filename = f"{sha256}.{extension}"
+    return os.path.join(upload_folder, filename), f"uploads/{filename}"
+
+def store_spooled(tmp_path, sha256, size, extension, upload_folder):
+    """Take a reference on spooled content, storing it under its hash if it is new.
+
+    Returns the relative image path; thumbnails are only generated for new content.
+    """
+    filepath, image_path = content_paths(sha256, extension, upload_folder)
+    created = []
+
+    def store_file():
+        if not os.path.exists(filepath):
+            os.replace(tmp_path, filepath)
+            created.append(image_path)
+
+    try:
+        Upload.acquire(image_path, sha256, size, store_file)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if created:
+        process_upload(image_path)
+    return image_path
+
 def save_uploaded_file(file):
-    """Save uploaded file and return the file path"""
+    """Save uploaded file under its content hash and return the file path.
+
+    The upload is streamed to a temporary file while being hashed, so it is
+    never held in memory. Identical content is stored once and shared via a
+    reference count; thumbnails are only generated for new content.
+    """
     if file and file.filename != '' and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # Add timestamp to avoid filename conflicts
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        
-        # Ensure upload folder exists
+        extension = file.filename.rsplit('.', 1)[1].lower()
         upload_folder = current_app.config['UPLOAD_FOLDER']
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
-        
+        tmp_path, sha256, size = spool_stream(file.stream, upload_folder)
         # Return relative path for database storage
-        return f"uploads/{filename}"
+        return store_spooled(tmp_path, sha256, size, extension, upload_folder)
     return None
 
+def release_uploaded_file(file_path):
+    """Drop one product's reference to an upload, deleting it when unused"""
+    if not file_path:
+        return False
+    remaining = Upload.release(file_path, lambda: delete_file(file_path))
+    if remaining is None:
+        # Legacy timestamp-named upload that was never shared
+        return delete_file(file_path)
+    return remaining == 0
+
 def delete_file(file_path):
     """Delete file from filesystem"""
     if file_path:
+        delete_variants(file_path)
         try:
-            full_path = os.path.join('app/static', file_path)
+            full_path = static_path(file_path)
             if os.path.exists(full_path):
                 os.remove(full_path)
                 return True
         except Exception:
             pass
-    return False 
\ No newline at end of file
+    return False
+
+def add_cache_headers(response):
+    """Serve content-addressed uploads with far-future cache headers"""
+    if request.endpoint == 'static' and response.status_code in (200, 304):
+        filename = (request.view_args or {}).get('filename', '')
+        if CONTENT_ADDRESSED_PATH.match(filename):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+            response.expires = None
+    return response
+
+def init_app(app):
+    """Initialize app with upload serving headers"""
+    app.after_request(add_cache_headers)
@@ -0,0 +1,159 @@
+import os
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+from app.models.database import get_db
+from app.models.upload import Upload
+from app.utils.process_pool import LazyProcessPool
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional: without it the original upload is served
+    Image = None
+
+# Derivative widths in pixels, smallest first
+IMAGE_VARIANTS = {'thumb': 160, 'card': 480, 'detail': 1024}
+# File extension -> Pillow format
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+
+def variant_name(image_path, variant, ext):
+    """Path of a derivative next to the original: uploads/x.jpg -> uploads/x.card.webp"""
+    stem = image_path.rsplit('.', 1)[0]
+    return f"{stem}.{variant}.{ext}"
+
+def static_path(image_path):
+    """Absolute filesystem path of a path stored relative to the static folder"""
+    return os.path.join(current_app.static_folder, image_path)
+
+def generate_variants(source, quality=80):
+    """Write every resized WebP/JPEG derivative of ``source``.
+
+    Runs in a worker process. Each file is written to a temporary name and
+    renamed into place so a derivative is never visible half-written.
+    Returns the number of files written.
+    """
+    written = 0
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'L'):
+            # JPEG has no alpha channel: flatten transparent images onto white
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+            image = background
+        stem = source.rsplit('.', 1)[0]
+        for variant, width in IMAGE_VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail((width, width * 4), Image.LANCZOS)
+            for ext, fmt in VARIANT_FORMATS.items():
+                target = f"{stem}.{variant}.{ext}"
+                tmp = f"{target}.tmp"
+                resized.save(tmp, fmt, quality=quality, optimize=True)
+                os.replace(tmp, target)
+                written += 1
+    return written
+
+def delete_variants(image_path):
+    """Remove every derivative of an image"""
+    for variant in IMAGE_VARIANTS:
+        for ext in VARIANT_FORMATS:
+            path = static_path(variant_name(image_path, variant, ext))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+class ImagePipeline:
+    """Generates image derivatives on a per-worker process pool"""
+
+    def __init__(self, app, workers=2, quality=80):
+        self.app = app
+        self.quality = quality
+        self._pool = LazyProcessPool(workers)
+
+    def submit(self, image_path):
+        """Queue derivative generation for an uploaded image"""
+        if Image is None:
+            return None
+        future = self._pool.submit(generate_variants, static_path(image_path), self.quality)
+        future.add_done_callback(lambda f: self._finished(image_path, f))
+        return future
+
+    def _finished(self, image_path, future):
+        error = future.exception()
+        if error is not None:
+            self.app.logger.error('Could not generate variants of %s: %s', image_path, error)
+            return
+        # Updating the products also bumps the catalog version, so cached pages
+        # rendered without the new srcset go stale
+        with self.app.app_context():
+            Upload.mark_variants_ready(image_path)
+
+def image_sources(product):
+    """srcset strings for a product image's derivatives, or None if they are not ready yet"""
+    image_path = product.image_path
+    if not image_path or not product.image_variants:
+        return None
+    sources = {}
+    for ext in VARIANT_FORMATS:
+        sources[ext] = ', '.join(
+            f"{url_for('static', filename=variant_name(image_path, variant, ext))} {width}w"
+            for variant, width in IMAGE_VARIANTS.items()
+        )
+    sources['src'] = url_for('static', filename=variant_name(image_path, 'card', 'jpg'))
+    return sources
+
+def process_upload(image_path):
+    """Schedule derivative generation for a freshly saved upload"""
+    return current_app.extensions['image_pipeline'].submit(image_path)
+
+def _has_variants(image_path):
+    return all(
+        os.path.exists(static_path(variant_name(image_path, variant, ext)))
+        for variant in IMAGE_VARIANTS for ext in VARIANT_FORMATS
+    )
+
+def backfill_variants(quality=80):
+    """Generate and record the derivatives of product images that have none recorded.
+
+    Covers images uploaded before derivatives were generated or recorded.
+    Returns ``(recorded, missing)``: images now marked ready, and image
+    files that no longer exist.
+    """
+    image_paths = [row[0] for row in get_db().execute(
+        'SELECT DISTINCT image_path FROM products WHERE image_path IS NOT NULL AND image_variants = 0'
+    )]
+    recorded = missing = 0
+    for image_path in image_paths:
+        if not os.path.isfile(static_path(image_path)):
+            missing += 1
+            continue
+        if not _has_variants(image_path):
+            generate_variants(static_path(image_path), quality)
+        Upload.mark_variants_ready(image_path)
+        recorded += 1
+    return recorded, missing
+
+@click.group('images')
+def images_cli():
+    """Product image commands."""
+
+@images_cli.command('backfill')
+@with_appcontext
+def backfill_command():
+    """Generate missing derivatives of existing product images."""
+    if Image is None:
+        raise click.ClickException('Pillow is required to generate image derivatives.')
+    recorded, missing = backfill_variants(current_app.config['IMAGE_QUALITY'])
+    click.echo(f'Recorded derivatives of {recorded} image(s).')
+    if missing:
+        click.echo(f'{missing} image file(s) are missing and were skipped.')
+
+def init_app(app):
+    """Initialize app with the image derivative pipeline"""
+    app.extensions['image_pipeline'] = ImagePipeline(
+        app,
+        workers=app.config['IMAGE_WORKERS'],
+        quality=app.config['IMAGE_QUALITY']
+    )
+    app.add_template_global(image_sources)
+    app.cli.add_command(images_cli)
@@ -0,0 +1,50 @@
+from flask import current_app
+from app.models.database import get_db, get_pool, SYNCHRONOUS_LEVELS
+from app.models.transaction import Transaction
+from app.utils.batch_writer import BatchWriter
+
+def write_orders(orders):
+    """BatchWriter handler: commit a batch of checkouts with the ledger's synchronous level.
+
+    With FULL, SQLite syncs the WAL on every commit, so an acknowledged
+    order survives a power failure. That one sync is shared by the whole
+    batch, which is what lets a burst of checkouts avoid queueing behind
+    one fsync each.
+    """
+    db = get_db()
+    db.execute(f"PRAGMA synchronous = {current_app.config['LEDGER_SYNCHRONOUS']}")
+    try:
+        Transaction.record_orders(orders)
+    finally:
+        db.execute(f'PRAGMA synchronous = {get_pool().synchronous}')
+
+def place_order(reference, amount, email, items, product_id=None, buyer_id=None):
+    """Record an initialized checkout and wait until it is committed.
+
+    Concurrent checkouts in this worker are group-committed by the order
+    writer. Returns False if the order could not be stored (queue full,
+    write error or no acknowledgement within LEDGER_ACK_TIMEOUT); the
+    caller must then not send the buyer on to pay.
+    """
+    order = {
+        'reference': reference,
+        'amount': amount,
+        'email': email,
+        'product_id': product_id,
+        'buyer_id': buyer_id,
+        'items': items
+    }
+    return current_app.extensions['order_writer'].write(order, timeout=current_app.config['LEDGER_ACK_TIMEOUT'])
+
+def init_app(app):
+    """Initialize app with the group-committing order writer"""
+    if app.config['LEDGER_SYNCHRONOUS'].upper() not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Invalid LEDGER_SYNCHRONOUS level: {app.config['LEDGER_SYNCHRONOUS']}")
+    app.extensions['order_writer'] = BatchWriter(
+        app,
+        write_orders,
+        max_batch=app.config['LEDGER_BATCH_SIZE'],
+        max_delay=app.config['LEDGER_FLUSH_INTERVAL'],
+        max_queue=app.config['LEDGER_QUEUE_SIZE'],
+        name='order-writer'
+    )
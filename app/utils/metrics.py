@@ -0,0 +1,326 @@
+import atexit
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, g, request, has_request_context
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+# name -> (type, help, histogram buckets)
+FAMILIES = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status.', None),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint.', LATENCY_BUCKETS),
+    'http_requests_rate_limited_total': ('counter', 'HTTP requests refused by rate limits, by endpoint.', None),
+    'http_requests_in_flight': ('gauge', 'HTTP requests currently being handled.', None),
+    'http_request_sql_queries': ('histogram', 'SQL statements run per HTTP request.', QUERY_COUNT_BUCKETS),
+    'http_request_sql_seconds': ('histogram', 'Time spent in SQL per HTTP request.', LATENCY_BUCKETS),
+    'sqlite_statement_duration_seconds': ('histogram', 'Duration of individual SQL statements.', SQL_BUCKETS),
+    'paystack_request_duration_seconds': ('histogram', 'Duration of Paystack API calls by outcome.', LATENCY_BUCKETS),
+}
+
+class MetricsRegistry:
+    """Per-process counters, gauges and histograms with label sets.
+
+    Samples are keyed by ``(name, labels)`` where labels is a tuple of
+    ``(key, value)`` pairs. Histogram buckets are stored non-cumulatively
+    and made cumulative when rendered. A forked child starts from zero so
+    requests served by the parent are not counted twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            self._check_pid()
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def add(self, name, labels=(), amount=1):
+        with self._lock:
+            self._check_pid()
+            key = (name, labels)
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        buckets = FAMILIES[name][2]
+        with self._lock:
+            self._check_pid()
+            key = (name, labels)
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            entry[0][bisect_left(buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self):
+        """JSON-serialisable copy of every sample"""
+        with self._lock:
+            self._check_pid()
+            return {
+                'pid': self._pid,
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'gauges': [[name, labels, value] for (name, labels), value in self.gauges.items()],
+                'histograms': [[name, labels, list(entry[0]), entry[1], entry[2]]
+                               for (name, labels), entry in self.histograms.items()]
+            }
+
+def merge_snapshots(snapshots):
+    """Sum samples with the same name and labels across process snapshots"""
+    counters, gauges, histograms = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get('counters', []):
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, value in snapshot.get('gauges', []):
+            key = (name, tuple(map(tuple, labels)))
+            gauges[key] = gauges.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot.get('histograms', []):
+            key = (name, tuple(map(tuple, labels)))
+            entry = histograms.get(key)
+            if entry is None:
+                histograms[key] = [list(buckets), total, count]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+                entry[1] += total
+                entry[2] += count
+    return {
+        'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+        'gauges': [[name, labels, value] for (name, labels), value in gauges.items()],
+        'histograms': [[name, labels, *entry] for (name, labels), entry in histograms.items()]
+    }
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render(snapshot):
+    """Render a snapshot in the Prometheus text exposition format"""
+    samples = {}
+    for kind in ('counters', 'gauges', 'histograms'):
+        for sample in snapshot[kind]:
+            samples.setdefault(sample[0], []).append(sample)
+    lines = []
+    for name, (kind, help_text, buckets) in FAMILIES.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for sample in sorted(samples.get(name, []), key=lambda sample: sample[1]):
+            labels = sample[1]
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(sample[2])}')
+                continue
+            counts, total, count = sample[2], sample[3], sample[4]
+            cumulative = 0
+            for bound, bucket_count in zip((*buckets, float('inf')), counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", _number(bound))])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class SnapshotStore:
+    """Shares metrics between worker processes through a directory of JSON files.
+
+    Every process periodically writes its own snapshot to ``<pid>.json``.
+    A scrape merges all of them. Snapshots of dead processes keep their
+    counters and histograms, so totals survive worker restarts, but their
+    gauges are dropped. Those snapshots are folded into ``archive.json``
+    so the directory does not grow without bound.
+    """
+
+    ARCHIVE = 'archive.json'
+
+    def __init__(self, directory, registry, interval=5.0):
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _write_json(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def flush(self):
+        """Write this process' snapshot"""
+        snapshot = self.registry.snapshot()
+        self._write_json(os.path.join(self.directory, f"{snapshot['pid']}.json"), snapshot)
+
+    def ensure_started(self):
+        """Start this process' periodic flush thread (once per process)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            atexit.register(self.flush)
+            self._thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception('Could not write metrics snapshot')
+
+    def _fold_dead(self, dead):
+        """Merge snapshots of dead processes into the archive (without their gauges)"""
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            archive = self._read_json(os.path.join(self.directory, self.ARCHIVE)) or {}
+            snapshots = [archive]
+            for path, snapshot in dead:
+                if os.path.exists(path):
+                    snapshots.append(dict(snapshot, gauges=[]))
+            merged = merge_snapshots(snapshots)
+            self._write_json(os.path.join(self.directory, self.ARCHIVE), merged)
+            for path, _ in dead:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def collect(self):
+        """Merge the snapshots of every worker, including this one right now"""
+        self.flush()
+        snapshots, dead = [], []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, filename)
+            snapshot = self._read_json(path)
+            if snapshot is None:
+                continue
+            if filename != self.ARCHIVE and not _pid_alive(snapshot['pid']):
+                dead.append((path, snapshot))
+                snapshot = dict(snapshot, gauges=[])
+            snapshots.append(snapshot)
+        if dead:
+            self._fold_dead(dead)
+        return merge_snapshots(snapshots)
+
+def _record_query(seconds):
+    """Pool observer: time every SQL statement, and tally it against the current request"""
+    registry = _registry
+    if registry is None:
+        return
+    registry.observe('sqlite_statement_duration_seconds', seconds)
+    if has_request_context() and 'metrics_started' in g:
+        g.metrics_sql_queries += 1
+        g.metrics_sql_seconds += seconds
+
+def _record_paystack(operation, outcome, seconds):
+    """Paystack client observer"""
+    if _registry is not None:
+        _registry.observe('paystack_request_duration_seconds', seconds,
+                          (('operation', operation), ('outcome', outcome)))
+
+# The pool and Paystack observers are plain callables with no app to look
+# things up in, so the registry is also held at module level.
+_registry = None
+
+def _endpoint_labels():
+    return (('blueprint', request.blueprint or ''), ('endpoint', request.endpoint or 'unmatched'))
+
+def start_request_timer():
+    g.metrics_started = time.perf_counter()
+    g.metrics_sql_queries = 0
+    g.metrics_sql_seconds = 0.0
+    g.metrics_labels = _endpoint_labels()
+    store = current_app.extensions.get('metrics_store')
+    if store is not None:
+        store.ensure_started()
+    current_app.extensions['metrics'].add('http_requests_in_flight', g.metrics_labels)
+
+def remember_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+def record_request(exc=None):
+    """Record latency, status and SQL usage once the request is finished"""
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    registry = current_app.extensions['metrics']
+    labels = g.metrics_labels
+    status = g.get('metrics_status', 500 if exc is not None else 200)
+    registry.add('http_requests_in_flight', labels, -1)
+    registry.inc('http_requests_total', (*labels, ('method', request.method), ('status', str(status))))
+    registry.observe('http_request_duration_seconds', time.perf_counter() - started, labels)
+    registry.observe('http_request_sql_queries', g.metrics_sql_queries, labels)
+    registry.observe('http_request_sql_seconds', g.metrics_sql_seconds, labels)
+
+def collect_metrics():
+    """Merged metrics of every worker process, rendered for Prometheus"""
+    store = current_app.extensions.get('metrics_store')
+    if store is not None:
+        return render(store.collect())
+    return render(current_app.extensions['metrics'].snapshot())
+
+def init_app(app):
+    """Initialize app with request, SQL and Paystack metrics"""
+    global _registry
+    registry = _registry = MetricsRegistry()
+    app.extensions['metrics'] = registry
+    if app.config['METRICS_DIR']:
+        app.extensions['metrics_store'] = SnapshotStore(
+            app.config['METRICS_DIR'], registry, interval=app.config['METRICS_FLUSH_INTERVAL'])
+    app.extensions['sqlite_pool'].observer = _record_query
+    app.extensions['paystack_observer'] = _record_paystack
+    app.before_request(start_request_timer)
+    app.after_request(remember_status)
+    app.teardown_request(record_request)
@@ -0,0 +1,65 @@
+import base64
+import json
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, size=2):
+    """Decode a cursor back into its sort key, or None if it is missing/invalid"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    # Values are bound straight into SQL, which only accepts scalars
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        return None
+    return tuple(values)
+
+class CursorPage:
+    """One page of keyset-paginated items, either loaded or streamed.
+
+    A loaded page wraps a list and its ``next_cursor``. A streamed page
+    wraps an iterator over up to ``limit + 1`` items: it yields the first
+    ``limit`` and only knows ``next_cursor`` once iteration is over, so a
+    streamed template must read it after its item loop.
+    """
+
+    def __init__(self, items, next_cursor=None, limit=None, cursor_of=None):
+        self._items = items
+        self.next_cursor = next_cursor
+        self.limit = limit
+        self._cursor_of = cursor_of
+
+    @property
+    def streamed(self):
+        return self.limit is not None
+
+    def __iter__(self):
+        if not self.streamed:
+            yield from self._items
+            return
+        previous = None
+        try:
+            for count, item in enumerate(self._items):
+                if count == self.limit:
+                    self.next_cursor = self._cursor_of(previous)
+                    break
+                previous = item
+                yield item
+        finally:
+            # Hand the underlying cursor's connection back straight away
+            close = getattr(self._items, 'close', None)
+            if close is not None:
+                close()
+
+    def __len__(self):
+        if self.streamed:
+            raise TypeError('A streamed page has no length until it has been iterated')
+        return len(self._items)
@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.process_pool import LazyProcessPool
+
+# Seconds clients are asked to wait (Retry-After) when hashing is overloaded
+RETRY_AFTER_SECONDS = 2
+
+class HashingOverloaded(Exception):
+    """Raised when too many password hashes are already queued or running"""
+
+class PasswordHasher:
+    """Runs password hashing on a bounded process pool.
+
+    Hashing is deliberately CPU-heavy. Running it in separate processes
+    keeps request workers free to serve the catalog, and the
+    ``max_pending`` limit sheds excess load (HashingOverloaded) instead of
+    letting a login storm queue up behind the pool.
+    """
+
+    def __init__(self, method, workers=2, max_pending=8, timeout=10):
+        self.method = method
+        self.timeout = timeout
+        self._pool = LazyProcessPool(workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # A hash that times out keeps running, so its slot is only freed when it finishes
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError as e:
+            raise HashingOverloaded() from e
+
+    def hash(self, password):
+        """Hash a password with the configured method and cost"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if a stored hash was made with a different method or cost"""
+        return password_hash.split('$', 1)[0] != self.method
+
+def get_password_hasher():
+    """Get the app's password hasher"""
+    return current_app.extensions['password_hasher']
+
+def init_app(app):
+    """Initialize app with the password hashing pool"""
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT']
+    )
@@ -1,46 +1,80 @@
-import requests
+import hashlib
+import re
 import uuid
 from flask import current_app
+from app.utils.paystack import get_paystack_client, PaystackError
 
-def initialize_payment(product_id, product_name, amount, email):
-    """Initialize payment with Paystack"""
-    headers = {
-        "Authorization": f"Bearer {current_app.config['PAYSTACK_SECRET_KEY']}",
-        "Content-Type": "application/json"
-    }
+def to_kobo(amount):
+    """Convert a price to Paystack's integer minor unit (kobo/cents)"""
+    return int(round(amount * 100))
+
+# Form nonces are generated by the browser (see main.js)
+NONCE_PATTERN = re.compile(r'^[A-Za-z0-9-]{16,64}$')
+
+def idempotency_key(buyer_id, product_id, nonce):
+    """Key of one checkout attempt: sha256 of buyer, product and form nonce; None without a valid nonce"""
+    if not nonce or not NONCE_PATTERN.match(nonce):
+        return None
+    return hashlib.sha256(f'{buyer_id}|{product_id}|{nonce}'.encode('utf-8')).hexdigest()
 
+def _initialize(amount, email, metadata):
     data = {
         "email": email,
-        "amount": int(amount * 100),  # Convert to kobo
+        "amount": amount,
         "reference": str(uuid.uuid4()),
         "callback_url": current_app.config['CALLBACK_URL'],
-        "metadata": {
-            "product_id": product_id,
-            "product_name": product_name
-        }
+        "metadata": metadata
     }
 
     try:
-        response = requests.post(
-            "https://api.paystack.co/transaction/initialize", 
-            json=data, 
-            headers=headers
-        )
-        res_data = response.json()
+        res_data = get_paystack_client().initialize_transaction(data)
 
         if res_data.get('status') is True:
             return {
                 'success': True,
                 'auth_url': res_data['data']['authorization_url'],
-                'reference': res_data['data']['reference']
+                'reference': res_data['data']['reference'],
+                'amount': data['amount']
             }
         else:
             return {
                 'success': False,
                 'error': res_data.get('message', 'Payment initialization failed')
             }
-    except Exception as e:
+    except PaystackError as e:
         return {
             'success': False,
-            'error': f'Network error: {str(e)}'
-        } 
\ No newline at end of file
+            'error': str(e)
+        }
+
+def initialize_payment(product_id, product_name, amount, email, buyer_id=None):
+    """Initialize payment with Paystack"""
+    metadata = {
+        "product_id": product_id,
+        "product_name": product_name
+    }
+    if buyer_id is not None:
+        metadata["buyer_id"] = buyer_id
+    return _initialize(to_kobo(amount), email, metadata)
+
+def initialize_order_payment(items, email, buyer_id=None):
+    """Initialize one Paystack payment for several line items.
+
+    ``items`` are dicts with product_id, name, quantity and unit_price;
+    they are sent along as itemized metadata.
+    """
+    metadata = {
+        "items": [
+            {
+                "product_id": item['product_id'],
+                "name": item['name'],
+                "quantity": item['quantity'],
+                "unit_price": to_kobo(item['unit_price'])
+            }
+            for item in items
+        ]
+    }
+    if buyer_id is not None:
+        metadata["buyer_id"] = buyer_id
+    amount = sum(to_kobo(item['unit_price']) * item['quantity'] for item in items)
+    return _initialize(amount, email, metadata)
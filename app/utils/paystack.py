@@ -0,0 +1,119 @@
+import os
+import random
+import time
+from urllib.parse import quote
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+# Upstream statuses worth retrying for idempotent calls
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class PaystackError(Exception):
+    """Raised when Paystack cannot be reached or returns an unusable response"""
+
+class PaystackClient:
+    """Keep-alive HTTP client for the Paystack API.
+
+    A single requests.Session per worker process reuses TCP/TLS connections
+    across checkouts. Every call has connect/read timeouts. Idempotent calls
+    are retried with jittered exponential backoff; non-idempotent calls are
+    only retried when the connection could not be established, since the
+    request cannot have reached Paystack in that case.
+    """
+
+    def __init__(self, secret_key, base_url='https://api.paystack.co', connect_timeout=3.05,
+                 read_timeout=10, max_retries=2, backoff=0.25, pool_size=10, observer=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pid = os.getpid()
+        # observer(operation, outcome, seconds) is called after every HTTP attempt
+        self.observer = observer
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {secret_key}",
+            "Content-Type": "application/json"
+        })
+
+    def _sleep_before_retry(self, attempt):
+        # Full jitter keeps retrying workers from stampeding Paystack in lockstep
+        time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    def _send(self, method, url, operation, **kwargs):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            outcome = str(response.status_code)
+            return response
+        except requests.Timeout:
+            outcome = 'timeout'
+            raise
+        finally:
+            if self.observer is not None:
+                self.observer(operation, outcome, time.perf_counter() - started)
+
+    def request(self, method, path, idempotent=False, **kwargs):
+        """Send a request and return the decoded JSON body"""
+        url = f"{self.base_url}{path}"
+        # Metrics label: the endpoint without path parameters, e.g. transaction/verify
+        operation = '/'.join(path.strip('/').split('/')[:2])
+        attempts = self.max_retries + 1
+        for attempt in range(attempts):
+            last_attempt = attempt + 1 >= attempts
+            try:
+                response = self._send(method, url, operation, **kwargs)
+            except requests.ConnectionError as e:
+                # ConnectTimeout is a ConnectionError and is always safe to retry
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+                if last_attempt or not retryable:
+                    raise PaystackError(f'Network error: {e}') from e
+            except requests.Timeout as e:
+                if last_attempt or not idempotent:
+                    raise PaystackError(f'Paystack timed out: {e}') from e
+            else:
+                if not (idempotent and response.status_code in RETRY_STATUSES and not last_attempt):
+                    try:
+                        return response.json()
+                    except ValueError as e:
+                        raise PaystackError(f'Invalid response from Paystack (HTTP {response.status_code})') from e
+            self._sleep_before_retry(attempt)
+
+    def initialize_transaction(self, payload):
+        """Start a transaction and return Paystack's response"""
+        return self.request('POST', '/transaction/initialize', json=payload)
+
+    def verify_transaction(self, reference):
+        """Look up the status of a transaction by reference"""
+        return self.request('GET', f"/transaction/verify/{quote(reference, safe='')}", idempotent=True)
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+def create_client(config, observer=None):
+    """Build a Paystack client from application config"""
+    return PaystackClient(
+        config['PAYSTACK_SECRET_KEY'],
+        base_url=config['PAYSTACK_BASE_URL'],
+        connect_timeout=config['PAYSTACK_CONNECT_TIMEOUT'],
+        read_timeout=config['PAYSTACK_READ_TIMEOUT'],
+        max_retries=config['PAYSTACK_MAX_RETRIES'],
+        backoff=config['PAYSTACK_RETRY_BACKOFF'],
+        pool_size=config['PAYSTACK_POOL_SIZE'],
+        observer=observer
+    )
+
+def get_paystack_client():
+    """Get this worker's Paystack client, creating it on first use"""
+    client = current_app.extensions.get('paystack')
+    # Sockets must not be shared with a parent process across fork()
+    if client is None or client.pid != os.getpid():
+        client = create_client(current_app.config, observer=current_app.extensions.get('paystack_observer'))
+        current_app.extensions['paystack'] = client
+    return client
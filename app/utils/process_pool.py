@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+class LazyProcessPool:
+    """ProcessPoolExecutor that is created on first use in each worker process.
+
+    Pools are never shared across fork(): a gunicorn worker that inherits a
+    pool from its parent gets a fresh one on first submit. Pool processes
+    are started from a forkserver (spawn where that is unavailable), never
+    forked from the worker itself, so tasks must be module-level functions.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # Not fork: by now the worker runs request, writer and verification
+                # threads, and a forked child could inherit a lock one of them held
+                # (sqlite, logging, a semaphore) and hang on it. The forkserver is
+                # a single-threaded process that imports the main module once
+                # (run.py builds an app there, but starts no threads) and forks
+                # every pool process from that clean state.
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                context = multiprocessing.get_context(method)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pid = os.getpid()
+            return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """Run ``fn`` in a pool process and return its future"""
+        return self._get_executor().submit(fn, *args, **kwargs)
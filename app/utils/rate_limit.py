@@ -0,0 +1,156 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from flask import current_app, request, session, jsonify, render_template
+from werkzeug.exceptions import TooManyRequests
+
+RATE_FORMAT = re.compile(r'^\s*(\d+)\s*/\s*(second|minute|hour|day)\s*$')
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+# Buckets untouched for this long are full again and can be forgotten
+PRUNE_AFTER_SECONDS = 86400
+PRUNE_EVERY = 1000
+
+def parse_rate(rate):
+    """Parse '10/minute' into ``(capacity, tokens_per_second)``"""
+    match = RATE_FORMAT.match(rate or '')
+    if not match:
+        raise ValueError(f'Invalid rate limit {rate!r}; expected e.g. "10/minute"')
+    capacity = int(match.group(1))
+    return capacity, capacity / PERIODS[match.group(2)]
+
+class TokenBucketLimiter:
+    """Token buckets stored in a SQLite file shared by every worker process.
+
+    A bucket holds up to ``capacity`` tokens and refills continuously at
+    ``rate`` tokens per second. Each check is a single UPSERT on the
+    bucket's primary key that refills, tests and takes a token atomically,
+    so workers never race and a check costs the same however many clients
+    are tracked. A refused request takes no token from any bucket. The
+    state is throwaway, so the file is written without fsync.
+    """
+
+    def __init__(self, path, busy_timeout=100):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._checks = 0
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            # Never share a SQLite handle with a parent process across fork()
+            self._conn = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000,
+                                         isolation_level=None, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode = WAL')
+            self._conn.execute('PRAGMA synchronous = OFF')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS token_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            ) WITHOUT ROWID
+            ''')
+            self._pid = os.getpid()
+        return self._conn
+
+    def take(self, key, capacity, rate, now=None):
+        """Take one token; returns 0 if allowed, else the seconds until one is available"""
+        return self.take_all([(key, capacity, rate)], now=now)
+
+    def take_all(self, buckets, now=None):
+        """Take one token from each ``(key, capacity, rate)`` bucket, or from none.
+
+        The buckets are checked in one transaction: if any of them is
+        empty, the tokens already taken from the others are put back.
+        Returns 0 if allowed, else the seconds until every bucket has a token.
+        """
+        now = time.time() if now is None else now
+        wait = 0
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for key, capacity, rate in buckets:
+                    params = {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+                    row = conn.execute('''
+                    INSERT INTO token_buckets (key, tokens, updated_at) VALUES (:key, :capacity - 1, :now)
+                    ON CONFLICT (key) DO UPDATE SET
+                        tokens = MIN(:capacity, tokens + (:now - updated_at) * :rate) - 1,
+                        updated_at = :now
+                    WHERE MIN(:capacity, tokens + (:now - updated_at) * :rate) >= 1
+                    RETURNING tokens
+                    ''', params).fetchone()
+                    if row is None:
+                        row = conn.execute('SELECT tokens, updated_at FROM token_buckets WHERE key = ?', (key,)).fetchone()
+                        available = min(capacity, row[0] + (now - row[1]) * rate)
+                        wait = max(wait, (1 - available) / rate, 0.001)
+                if wait:
+                    conn.execute('ROLLBACK')
+                    return wait
+                self._checks += 1
+                if self._checks % PRUNE_EVERY == 0:
+                    conn.execute('DELETE FROM token_buckets WHERE updated_at < ?', (now - PRUNE_AFTER_SECONDS,))
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+        return 0
+
+def _client_keys(scopes):
+    """``(scope, identity)`` of every bucket that applies to this request"""
+    ip = request.remote_addr or 'unknown'
+    if 'ip' in scopes:
+        yield 'ip', ip
+    if 'user' in scopes:
+        if session.get('user_id'):
+            yield 'user', str(session['user_id'])
+        else:
+            # Login and register by the username being tried, from this IP only,
+            # so nobody else can lock an account out by posting bad passwords
+            username = request.form.get('username', '').strip().lower()
+            if username:
+                yield 'user', f'{ip}:{username}'
+
+def check_rate_limit():
+    """before_request hook: refuse the request with 429 once a bucket is empty"""
+    rules = current_app.extensions['rate_limits'].get(request.endpoint)
+    if not rules or request.method not in current_app.config['RATE_LIMIT_METHODS']:
+        return None
+    limiter = current_app.extensions['rate_limiter']
+    buckets = [(f'{request.endpoint}:{scope}:{identity}', *rules[scope]) for scope, identity in _client_keys(rules)]
+    try:
+        retry_after = limiter.take_all(buckets)
+    except sqlite3.Error:
+        # A busy or broken limiter must not take the site down with it
+        current_app.logger.exception('Rate limiter unavailable; allowing request')
+        return None
+    if retry_after:
+        metrics = current_app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.inc('http_requests_rate_limited_total', (('endpoint', request.endpoint),))
+        raise TooManyRequests(retry_after=math.ceil(retry_after))
+    return None
+
+def rate_limited(error):
+    """429 handler: JSON for API clients, a page for browsers; both carry Retry-After"""
+    headers = {'Retry-After': str(error.retry_after)}
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'error': 'Too many requests.', 'retry_after': error.retry_after}), 429, headers
+    return render_template('rate_limited.html', retry_after=error.retry_after), 429, headers
+
+def init_app(app):
+    """Initialize app with per-endpoint token-bucket rate limits"""
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return
+    app.extensions['rate_limits'] = {
+        endpoint: {scope: parse_rate(rate) for scope, rate in scopes.items() if rate}
+        for endpoint, scopes in app.config['RATE_LIMITS'].items()
+    }
+    app.extensions['rate_limiter'] = TokenBucketLimiter(app.config['RATE_LIMIT_DB'])
+    app.before_request(check_rate_limit)
+    app.register_error_handler(TooManyRequests, rate_limited)
@@ -0,0 +1,41 @@
+from flask import current_app, request, stream_template
+
+# Rendered output is sent in chunks of about this many characters: the page
+# head and first cards go out at once, without a write per template fragment
+STREAM_CHUNK_SIZE = 8192
+
+def _coalesce(chunks, size):
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer)
+
+def page_size():
+    """The ?limit= of a catalog page, clamped to CATALOG_MAX_PAGE_SIZE"""
+    limit = request.args.get('limit', current_app.config['CATALOG_PAGE_SIZE'], type=int)
+    return max(1, min(limit, current_app.config['CATALOG_MAX_PAGE_SIZE']))
+
+def should_stream(limit):
+    """Whether a page of ``limit`` products is large enough to stream"""
+    threshold = current_app.config['CATALOG_STREAM_MIN_PAGE_SIZE']
+    return threshold > 0 and limit >= threshold
+
+def render_streamed(template_name, **context):
+    """Render a template as a streamed HTML response.
+
+    Streamed responses are neither cached nor compressed.
+    """
+    response = current_app.response_class(
+        _coalesce(stream_template(template_name, **context), STREAM_CHUNK_SIZE),
+        mimetype='text/html'
+    )
+    # Ask reverse proxies to pass chunks through instead of buffering the page
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,109 @@
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app.models.transaction import Transaction
+from app.models.verification import VerificationJob
+from app.utils.paystack import get_paystack_client, PaystackError
+from app.utils.webhooks import transaction_row
+
+# Paystack transaction statuses that will not change any more
+FINAL_STATUSES = {'success', 'failed', 'reversed'}
+
+class VerificationWorker:
+    """Verifies queued payment references off the request path.
+
+    A dispatcher thread claims due jobs from the verification_jobs table
+    in batches and fans them out to a small thread pool, which bounds the
+    number of concurrent calls to Paystack per worker process. Outcomes
+    are written back in one transaction per batch. Jobs that are not final
+    yet, or that hit a network error, are retried with jittered backoff.
+    """
+
+    def __init__(self, app, concurrency=4, batch_size=20, poll_interval=2.0,
+                 lease_seconds=60, max_attempts=5, retry_backoff=5.0):
+        self.app = app
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def wake(self):
+        """Start the worker if needed and have it look for due jobs now"""
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._pid != os.getpid() or not self._thread.is_alive():
+                    self._pid = os.getpid()
+                    self._worker_id = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+                    self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                                        thread_name_prefix='paystack-verify')
+                    self._thread = threading.Thread(target=self._run, name='verification-dispatcher', daemon=True)
+                    self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    jobs = VerificationJob.claim(self._worker_id, self.batch_size, self.lease_seconds)
+                if jobs:
+                    results = list(self._executor.map(self._verify, jobs))
+                    with self.app.app_context():
+                        Transaction.record_events([row for _, row in results if row])
+                        VerificationJob.finish([outcome for outcome, _ in results])
+                    continue
+            except Exception:
+                self.app.logger.exception('Payment verification batch failed')
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _retry(self, reference, attempts, error):
+        if attempts >= self.max_attempts:
+            return (reference, 'failed', None, error)
+        delay = self.retry_backoff * (2 ** (attempts - 1))
+        return (reference, 'pending', time.time() + random.uniform(delay / 2, delay), error)
+
+    def _verify(self, job):
+        reference, attempts = job
+        try:
+            with self.app.app_context():
+                res_data = get_paystack_client().verify_transaction(reference)
+        except PaystackError as e:
+            return self._retry(reference, attempts, str(e)), None
+        data = res_data.get('data') if res_data.get('status') is True else None
+        if not isinstance(data, dict) or not data.get('reference'):
+            return self._retry(reference, attempts, res_data.get('message', 'Verification failed')), None
+        row = transaction_row(data, 'transaction.verify')
+        if row['status'] in FINAL_STATUSES:
+            return (reference, 'done', None, None), row
+        return self._retry(reference, attempts, f"Transaction is {row['status']}"), row
+
+def request_verification(reference):
+    """Queue a reference for background verification"""
+    VerificationJob.enqueue(reference)
+    wake_verification_worker()
+
+def wake_verification_worker():
+    """Make sure this process is working through due verification jobs"""
+    current_app.extensions['verification_worker'].wake()
+
+def init_app(app):
+    """Initialize app with the payment verification worker"""
+    app.extensions['verification_worker'] = VerificationWorker(
+        app,
+        concurrency=app.config['VERIFY_CONCURRENCY'],
+        batch_size=app.config['VERIFY_BATCH_SIZE'],
+        poll_interval=app.config['VERIFY_POLL_INTERVAL'],
+        lease_seconds=app.config['VERIFY_LEASE_SECONDS'],
+        max_attempts=app.config['VERIFY_MAX_ATTEMPTS'],
+        retry_backoff=app.config['VERIFY_RETRY_BACKOFF']
+    )
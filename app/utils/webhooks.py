@@ -0,0 +1,76 @@
+import hashlib
+import hmac
+from flask import current_app
+from app.models.transaction import Transaction
+from app.utils.batch_writer import BatchWriter
+
+def verify_signature(payload, signature, secret_key):
+    """Check Paystack's HMAC-SHA512 signature of the raw request body"""
+    if not signature:
+        return False
+    expected = hmac.new(secret_key.encode('utf-8'), payload, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def transaction_row(data, event_name):
+    """Flatten a Paystack transaction object into a transactions row"""
+    metadata = data.get('metadata') or {}
+    if not isinstance(metadata, dict):
+        metadata = {}
+    customer = data.get('customer') or {}
+    return {
+        'reference': str(data['reference']),
+        'status': data.get('status') or event_name.split('.', 1)[1],
+        'amount': data.get('amount'),
+        'currency': data.get('currency'),
+        'email': customer.get('email'),
+        'product_id': metadata.get('product_id'),
+        'buyer_id': metadata.get('buyer_id'),
+        'event': event_name,
+        'paid_at': data.get('paid_at') or data.get('paidAt')
+    }
+
+def parse_event(event):
+    """Flatten a Paystack charge or refund event into a transactions row, or None to ignore it"""
+    name = event.get('event', '')
+    data = event.get('data') or {}
+    if name == 'refund.processed' and data.get('transaction_reference'):
+        # A completed refund reverses its charge if it covers the whole amount (see record_events)
+        if not isinstance(data.get('amount'), int):
+            return None
+        return {
+            'reference': str(data['transaction_reference']),
+            'status': 'reversed',
+            'refund_amount': data['amount'],
+            'amount': None,
+            'currency': None,
+            'email': None,
+            'product_id': None,
+            'buyer_id': None,
+            'event': name,
+            'paid_at': None
+        }
+    if not name.startswith('charge.') or not data.get('reference'):
+        return None
+    return transaction_row(data, name)
+
+def enqueue_event(event):
+    """Queue a verified webhook event for recording.
+
+    Returns True if it was queued or is not one we track, False if the
+    queue is full and Paystack should retry later.
+    """
+    row = parse_event(event)
+    if row is None:
+        return True
+    return current_app.extensions['webhook_writer'].submit(row)
+
+def init_app(app):
+    """Initialize app with the webhook event writer"""
+    app.extensions['webhook_writer'] = BatchWriter(
+        app,
+        Transaction.record_events,
+        max_batch=app.config['WEBHOOK_BATCH_SIZE'],
+        max_delay=app.config['WEBHOOK_FLUSH_INTERVAL'],
+        max_queue=app.config['WEBHOOK_QUEUE_SIZE'],
+        name='webhook-writer'
+    )
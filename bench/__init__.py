@@ -0,0 +1,6 @@
+"""Load-test and micro-benchmark suite.
+
+    python -m bench.run --products 100000 --output before.json
+    python -m bench.micro --products 100000 --output micro.json
+    python -m bench.compare before.json after.json
+"""
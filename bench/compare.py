@@ -0,0 +1,48 @@
+"""Compare two benchmark reports scenario by scenario."""
+import argparse
+import json
+import sys
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps')
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _change(before, after):
+    if before in (None, 0) or after is None:
+        return None
+    return (after - before) / before * 100
+
+def compare(baseline, candidate):
+    """Yield (scenario, metric, before, after, percent change) for every shared scenario"""
+    for name in sorted(baseline['scenarios'].keys() & candidate['scenarios'].keys()):
+        before, after = baseline['scenarios'][name], candidate['scenarios'][name]
+        for metric in METRICS:
+            yield name, metric, before.get(metric), after.get(metric), _change(before.get(metric), after.get(metric))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.compare', description=__doc__)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--fail-above', type=float, metavar='PCT',
+                        help='exit 1 if any p95 latency regressed by more than PCT percent')
+    args = parser.parse_args(argv)
+    baseline, candidate = _load(args.baseline), _load(args.candidate)
+
+    print(f"baseline  {baseline['environment'].get('commit')}")
+    print(f"candidate {candidate['environment'].get('commit')}")
+    print(f"{'scenario':<24}{'metric':<16}{'baseline':>12}{'candidate':>12}{'change':>10}")
+    regressed = []
+    for name, metric, before, after, change in compare(baseline, candidate):
+        shown = f'{change:+.1f}%' if change is not None else 'n/a'
+        print(f'{name:<24}{metric:<16}{before if before is not None else "-":>12}'
+              f'{after if after is not None else "-":>12}{shown:>10}')
+        if metric == 'p95_ms' and args.fail_above is not None and change is not None and change > args.fail_above:
+            regressed.append(name)
+    if regressed:
+        print(f"p95 regressed by more than {args.fail_above}% in: {', '.join(regressed)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
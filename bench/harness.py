@@ -0,0 +1,41 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from werkzeug.serving import make_server
+from app import create_app
+from .paystack_stub import PaystackStub
+from .seed import seed
+
+class BenchEnvironment:
+    """A seeded testing app wired to a local Paystack stub, in a scratch directory"""
+
+    def __init__(self, sellers, buyers, products, paystack_latency=0.0, random_seed=42):
+        self.workdir = tempfile.mkdtemp(prefix='bench-')
+        self.stub = PaystackStub(latency=paystack_latency).start()
+        self.app = create_app('testing', overrides={
+            'DATABASE_PATH': os.path.join(self.workdir, 'bench.db'),
+            'PAYSTACK_BASE_URL': self.stub.url,
+            'CALLBACK_URL': 'http://127.0.0.1/payment-success',
+            'DEBUG': False,
+            # Every simulated client shares 127.0.0.1
+            'RATE_LIMIT_ENABLED': False
+        })
+        with self.app.app_context():
+            self.dataset = seed(sellers=sellers, buyers=buyers, products=products, random_seed=random_seed)
+        self.server = None
+
+    def serve(self):
+        """Serve the app on a threaded local HTTP server and return its base URL"""
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        self.server = make_server('127.0.0.1', 0, self.app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, name='bench-server', daemon=True).start()
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+        self.stub.stop()
+        self.app.extensions['sqlite_pool'].close_all()
+        shutil.rmtree(self.workdir, ignore_errors=True)
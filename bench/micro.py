@@ -0,0 +1,76 @@
+"""Micro-benchmarks of model-level operations against a seeded database."""
+import argparse
+import random
+import time
+from app.models.database import get_db
+from app.models.product import Product
+from .harness import BenchEnvironment
+from .report import environment, summarize, write_report
+from .seed import WORDS
+
+def _middle_cursor():
+    """Keyset cursor of the product halfway down the catalog"""
+    row = get_db().execute('''
+    SELECT created_at, id FROM products ORDER BY created_at DESC, id DESC
+    LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM products)
+    ''').fetchone()
+    return (row['created_at'], row['id']) if row else None
+
+def _operations(dataset, page_size):
+    low, high = dataset['product_id_range']
+    middle = _middle_cursor()
+    return {
+        'catalog_first_page': lambda rng: Product.get_page(page_size),
+        'catalog_middle_page': lambda rng: Product.get_page(page_size, cursor=middle),
+        'catalog_api_projection': lambda rng: Product.get_fields_page(['id', 'name', 'price'], page_size),
+        'search': lambda rng: Product.search(rng.choice(WORDS), page_size),
+        'product_by_id': lambda rng: Product.get_by_id(rng.randint(low, high)),
+        'stats_global': lambda rng: Product.get_stats(),
+        'stats_seller': lambda rng: Product.get_stats(seller_id=rng.randint(1, dataset['sellers'])),
+        'catalog_version': lambda rng: Product.get_catalog_version()
+    }
+
+def run_operation(operation, iterations, warmup, random_seed):
+    """Call one operation ``iterations`` times and summarize the call latencies"""
+    rng = random.Random(random_seed)
+    for _ in range(warmup):
+        operation(rng)
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        operation(rng)
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies, 0, sum(latencies))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.micro', description=__doc__)
+    parser.add_argument('--sellers', type=int, default=20)
+    parser.add_argument('--buyers', type=int, default=100)
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    bench = BenchEnvironment(args.sellers, args.buyers, args.products, random_seed=args.seed)
+    try:
+        with bench.app.app_context():
+            operations = _operations(bench.dataset, bench.app.config['CATALOG_PAGE_SIZE'])
+            results = {
+                name: run_operation(operation, args.iterations, args.warmup, args.seed)
+                for name, operation in operations.items()
+            }
+    finally:
+        bench.close()
+    write_report({
+        'kind': 'micro',
+        'environment': environment(),
+        'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+        'scenarios': results
+    }, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VERIFY_PATH = re.compile(r'^/transaction/verify/(?P<reference>[^/?]+)$')
+
+class PaystackStubHandler(BaseHTTPRequestHandler):
+    """Answers the two Paystack endpoints the app calls"""
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        time.sleep(self.server.latency)
+        if self.path != '/transaction/initialize':
+            return self._send_json(404, {'status': False, 'message': 'Not found'})
+        reference = payload.get('reference') or str(uuid.uuid4())
+        self._send_json(200, {
+            'status': True,
+            'message': 'Authorization URL created',
+            'data': {
+                'authorization_url': f'https://checkout.paystack.test/{reference}',
+                'access_code': reference[:12],
+                'reference': reference
+            }
+        })
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        match = VERIFY_PATH.match(self.path)
+        if not match:
+            return self._send_json(404, {'status': False, 'message': 'Not found'})
+        self._send_json(200, {
+            'status': True,
+            'message': 'Verification successful',
+            'data': {'reference': match.group('reference'), 'status': 'success', 'currency': 'ZAR'}
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+class PaystackStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Many app workers may connect at once; the default backlog of 5 refuses them
+    request_queue_size = 1024
+
+class PaystackStub:
+    """Local stand-in for api.paystack.co with a configurable response latency"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.server = PaystackStubServer((host, port), PaystackStubHandler)
+        self.server.latency = latency
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='paystack-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
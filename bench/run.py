@@ -0,0 +1,134 @@
+"""HTTP load test: drive the main pages at a fixed concurrency and report latency percentiles."""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from .harness import BenchEnvironment
+from .report import environment, summarize, write_report
+from .seed import PASSWORD, WORDS, buyer_name, seller_name
+
+def _index(session, base, rng, dataset):
+    return session.get(f'{base}/', allow_redirects=False)
+
+def _login(session, base, rng, dataset):
+    session.cookies.clear()
+    return session.post(f'{base}/login', data={'username': buyer_name(rng.randrange(dataset['buyers'])),
+                                               'password': PASSWORD}, allow_redirects=False)
+
+def _add_product(session, base, rng, dataset):
+    return session.post(f'{base}/add-product', data={
+        'name': ' '.join(rng.sample(WORDS, 3)).title(),
+        'description': ' '.join(rng.choices(WORDS, k=20)),
+        'price': f'{rng.uniform(10, 5000):.2f}'
+    }, allow_redirects=False)
+
+def _manage_products(session, base, rng, dataset):
+    return session.get(f'{base}/manage-products', allow_redirects=False)
+
+def _pay(session, base, rng, dataset):
+    product_id = rng.randint(*dataset['product_id_range'])
+    return session.post(f'{base}/pay/{product_id}', data={'email': 'buyer@bench.test'}, allow_redirects=False)
+
+def _redirects_to(fragment):
+    return lambda response: response.status_code == 302 and fragment in response.headers.get('Location', '')
+
+# name -> (role the client logs in as, request, success check)
+SCENARIOS = {
+    'index': (None, _index, lambda response: response.status_code == 200),
+    'login': (None, _login, lambda response: response.status_code == 302),
+    'add_product': ('seller', _add_product, _redirects_to('/manage-products')),
+    'manage_products': ('seller', _manage_products, lambda response: response.status_code == 200),
+    'pay': ('buyer', _pay, _redirects_to('checkout.paystack.test'))
+}
+
+def _client(base, role, worker, dataset):
+    session = requests.Session()
+    if role is not None:
+        count = dataset['sellers'] if role == 'seller' else dataset['buyers']
+        username = (seller_name if role == 'seller' else buyer_name)(worker % count)
+        response = session.post(f'{base}/login', data={'username': username, 'password': PASSWORD},
+                                allow_redirects=False)
+        response.raise_for_status()
+    return session
+
+def run_scenario(base, name, dataset, concurrency, total, warmup, random_seed):
+    """Send ``total`` requests of one scenario from ``concurrency`` clients"""
+    role, send, check = SCENARIOS[name]
+    clients = [_client(base, role, worker, dataset) for worker in range(concurrency)]
+    remaining = [warmup + total]
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+
+    def worker(index):
+        session = clients[index]
+        rng = random.Random(random_seed + index)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+                measured = remaining[0] < total
+            started = time.perf_counter()
+            try:
+                ok = check(send(session, base, rng, dataset))
+            except requests.RequestException:
+                ok = False
+            latency = time.perf_counter() - started
+            if measured:
+                with lock:
+                    latencies.append(latency)
+                    errors[0] += not ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    for session in clients:
+        session.close()
+    # Throughput over the measured share of the run only
+    return summarize(latencies, errors[0], elapsed * total / (warmup + total))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.run', description=__doc__)
+    parser.add_argument('--sellers', type=int, default=20)
+    parser.add_argument('--buyers', type=int, default=100)
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=50, help='unmeasured requests per scenario')
+    parser.add_argument('--paystack-latency', type=float, default=0.0, help='stub response delay in ms')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(args.scenarios) - SCENARIOS.keys()
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    bench = BenchEnvironment(args.sellers, args.buyers, args.products,
+                             paystack_latency=args.paystack_latency / 1000, random_seed=args.seed)
+    try:
+        base = bench.serve()
+        results = {
+            name: run_scenario(base, name, bench.dataset, args.concurrency, args.requests, args.warmup, args.seed)
+            for name in args.scenarios
+        }
+    finally:
+        bench.close()
+    write_report({
+        'kind': 'http',
+        'environment': environment(),
+        'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+        'scenarios': results
+    }, args.output)
+
+if __name__ == '__main__':
+    main()
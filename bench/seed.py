@@ -0,0 +1,63 @@
+import random
+from datetime import datetime, timedelta
+from app.models.database import get_db_connection
+from app.utils.passwords import get_password_hasher
+
+PASSWORD = 'bench-password'
+WORDS = ('red', 'blue', 'classic', 'vintage', 'leather', 'wooden', 'cotton', 'smart', 'compact', 'deluxe',
+         'chair', 'lamp', 'phone', 'jacket', 'table', 'watch', 'backpack', 'speaker', 'kettle', 'bicycle')
+
+def seller_name(n):
+    return f'seller{n}'
+
+def buyer_name(n):
+    return f'buyer{n}'
+
+def _product_rows(count, seller_ids, rng, batch_size):
+    start = datetime(2020, 1, 1)
+    batch = []
+    for i in range(count):
+        words = rng.sample(WORDS, 3)
+        batch.append((
+            ' '.join(words).title(),
+            f'A {words[0]} {words[1]} {words[2]}, item {i}. ' + ' '.join(rng.choices(WORDS, k=20)),
+            round(rng.uniform(10, 5000), 2),
+            None,
+            rng.choice(seller_ids),
+            (start + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S')
+        ))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def seed(sellers=20, buyers=100, products=10000, batch_size=5000, random_seed=42):
+    """Fill the (freshly initialised) app database with a synthetic catalog.
+
+    Must run inside an app context. Every user shares the password
+    ``PASSWORD``, hashed once with the configured method.
+    """
+    rng = random.Random(random_seed)
+    password_hash = get_password_hasher().hash(PASSWORD)
+    conn = get_db_connection()
+    try:
+        conn.executemany(
+            'INSERT INTO users (username, email, password_hash, user_type) VALUES (?, ?, ?, ?)',
+            [(seller_name(n), f'{seller_name(n)}@bench.test', password_hash, 'seller') for n in range(sellers)]
+            + [(buyer_name(n), f'{buyer_name(n)}@bench.test', password_hash, 'buyer') for n in range(buyers)]
+        )
+        conn.commit()
+        seller_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE user_type = 'seller'")]
+        for batch in _product_rows(products, seller_ids, rng, batch_size):
+            conn.executemany(
+                'INSERT INTO products (name, description, price, image_path, seller_id, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                batch
+            )
+            conn.commit()
+        conn.execute('PRAGMA optimize')
+        product_ids = conn.execute('SELECT MIN(id), MAX(id) FROM products').fetchone()
+        return {'sellers': sellers, 'buyers': buyers, 'products': products,
+                'product_id_range': tuple(product_ids)}
+    finally:
+        conn.close()
@@ -0,0 +1,43 @@
+"""Gunicorn settings, selected through environment variables.
+
+GUNICORN_WORKER_CLASS picks the serving mode:
+
+  gthread (default) a fixed pool of GUNICORN_THREADS threads per process.
+  gevent  cooperative workers. A request waiting on Paystack yields its
+          greenlet, so one process can keep hundreds of checkouts in
+          flight (GUNICORN_WORKER_CONNECTIONS). SQLite queries, lock waits
+          and the hashing pool still block the whole process while they
+          run, so only use it when those are known to be short.
+  sync    one request at a time per process.
+"""
+import multiprocessing
+import os
+import tempfile
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+# Every worker forks its own password hashing and thumbnail process pools
+# (PASSWORD_HASH_WORKERS, IMAGE_WORKERS), so each one costs several Python
+# processes of memory. gthread and gevent workers already serve many
+# requests at once, so one per CPU is enough; sync workers need the usual 2n+1.
+default_workers = multiprocessing.cpu_count()
+if worker_class == 'sync':
+    default_workers = default_workers * 2 + 1
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 500))
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Each worker must import the app after gevent has patched the standard library
+preload_app = False
+
+# Requests handled concurrently by one worker process
+concurrency = {'gevent': worker_connections, 'gthread': threads}.get(worker_class, 1)
+
+# Size the per-process Paystack connection pool to the worker's concurrency so
+# waiting checkouts reuse keep-alive connections instead of opening new ones.
+os.environ.setdefault('PAYSTACK_POOL_SIZE', str(concurrency))
+
+# Workers share metrics snapshots through this directory (see app/utils/metrics.py)
+os.environ.setdefault('METRICS_DIR', tempfile.mkdtemp(prefix='gunicorn-metrics-'))
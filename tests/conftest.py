@@ -0,0 +1,43 @@
+import pytest
+from app import create_app
+from app.models.database import get_db
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', overrides={
+        'DATABASE_PATH': str(tmp_path / 'test.db'),
+        'RATE_LIMIT_DB': str(tmp_path / 'ratelimit.db'),
+        'METRICS_DIR': None,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+        'PAYSTACK_BASE_URL': 'http://127.0.0.1:9',
+        'PAYSTACK_MAX_RETRIES': 0,
+        'DEBUG': False
+    })
+    yield app
+    app.extensions['sqlite_pool'].close_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def seller_id(app):
+    with app.app_context():
+        db = get_db()
+        cursor = db.execute(
+            "INSERT INTO users (username, email, password_hash, user_type) VALUES ('seller', 's@example.com', 'x', 'seller')"
+        )
+        db.commit()
+        return cursor.lastrowid
+
+@pytest.fixture
+def products(app, seller_id):
+    """Ten products of one seller; returns their ids"""
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            'INSERT INTO products (name, description, price, seller_id) VALUES (?, ?, ?, ?)',
+            [(f'Widget {i}', 'A widget', 10.0 + i, seller_id) for i in range(10)]
+        )
+        db.commit()
+        return [row['id'] for row in db.execute('SELECT id FROM products ORDER BY id')]
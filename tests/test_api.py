@@ -0,0 +1,32 @@
+from datetime import timedelta
+from werkzeug.http import http_date
+from app.utils.pagination import encode_cursor
+
+def test_list_products_pages_with_cursor(client, products):
+    first = client.get('/api/products?limit=4&fields=id,name')
+    assert first.status_code == 200
+    assert len(first.json['products']) == 4
+    second = client.get(f"/api/products?limit=4&fields=id&cursor={first.json['next_cursor']}")
+    assert second.status_code == 200
+    assert not {p['id'] for p in first.json['products']} & {p['id'] for p in second.json['products']}
+
+def test_list_products_rejects_malformed_cursor(client, products):
+    for cursor in ('W1sxXSxbMl1d', encode_cursor(None, 1), encode_cursor(True, 1), 'garbage'):
+        response = client.get(f'/api/products?cursor={cursor}')
+        assert response.status_code == 400
+        assert response.json == {'error': 'Invalid cursor.'}
+
+def test_if_modified_since_in_the_second_of_the_last_write_is_not_304(client, products):
+    first = client.get('/api/products')
+    last_modified = first.headers['Last-Modified']
+    assert client.get('/api/products', headers={'If-Modified-Since': last_modified}).status_code == 200
+    later = http_date(first.last_modified + timedelta(seconds=1))
+    assert client.get('/api/products', headers={'If-Modified-Since': later}).status_code == 304
+
+def test_etag_takes_precedence_over_if_modified_since(client, products):
+    first = client.get('/api/products')
+    later = http_date(first.last_modified + timedelta(seconds=1))
+    response = client.get('/api/products', headers={'If-None-Match': '"stale"', 'If-Modified-Since': later})
+    assert response.status_code == 200
+    response = client.get('/api/products', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
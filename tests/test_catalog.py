@@ -0,0 +1,47 @@
+import os
+import pytest
+from app.models.database import get_db
+from app.models.product import Product
+from app.utils.catalog import import_batch
+
+@pytest.fixture
+def image_files(app, tmp_path):
+    app.static_folder = str(tmp_path / 'static')
+    app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
+    source = tmp_path / 'images'
+    source.mkdir()
+    (source / 'a.png').write_bytes(b'first image')
+    (source / 'b.png').write_bytes(b'second image')
+    return str(source / 'a.png'), str(source / 'b.png')
+
+def _rows(image_files):
+    a, b = image_files
+    return [('A', None, 1.0, a), ('B', None, 2.0, b), ('A again', None, 3.0, a), ('No image', None, 4.0, None)]
+
+def test_import_batch_commits_once(app, seller_id, image_files):
+    with app.app_context():
+        db = get_db()
+        statements = []
+        db.set_trace_callback(statements.append)
+        try:
+            assert import_batch(_rows(image_files), seller_id) == 4
+        finally:
+            db.set_trace_callback(None)
+        assert statements.count('COMMIT') == 1
+        refcounts = dict(db.execute('SELECT path, refcount FROM uploads').fetchall())
+        assert sorted(refcounts.values()) == [1, 2]
+        for path in refcounts:
+            assert os.path.exists(os.path.join(app.static_folder, path))
+        assert not [name for name in os.listdir(app.config['UPLOAD_FOLDER']) if name.endswith('.part')]
+
+def test_failed_batch_leaves_no_rows_references_or_files(app, seller_id, image_files, monkeypatch):
+    def broken(db, rows):
+        raise RuntimeError('insert failed')
+    monkeypatch.setattr(Product, 'insert_rows', staticmethod(broken))
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            import_batch(_rows(image_files), seller_id)
+        db = get_db()
+        assert db.execute('SELECT COUNT(*) FROM uploads').fetchone()[0] == 0
+        assert db.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 0
+        assert os.listdir(app.config['UPLOAD_FOLDER']) == []
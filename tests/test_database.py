@@ -0,0 +1,39 @@
+import time
+from app.models.database import ConnectionPool
+
+def _pool(tmp_path, observed):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'))
+    pool.observer = observed.append
+    return pool
+
+def test_statement_time_includes_fetching(tmp_path):
+    observed = []
+    pool = _pool(tmp_path, observed)
+    conn = pool.acquire()
+    conn.create_function('slow', 1, lambda value: time.sleep(0.002) or value)
+    conn.execute('CREATE TABLE t (n INTEGER)')
+    conn.executemany('INSERT INTO t VALUES (?)', [(n,) for n in range(20)])
+    del observed[:]
+
+    rows = conn.execute('SELECT slow(n) FROM t').fetchall()
+    assert len(rows) == 20
+    assert len(observed) == 1
+    assert observed[0] >= 0.035
+    pool.close_all()
+
+def test_each_statement_is_reported_once(tmp_path):
+    observed = []
+    pool = _pool(tmp_path, observed)
+    conn = pool.acquire()
+    conn.execute('CREATE TABLE t (n INTEGER)')
+    conn.executemany('INSERT INTO t VALUES (?)', [(n,) for n in range(5)])
+    assert len(observed) == 2
+
+    assert conn.execute('SELECT n FROM t WHERE n = 3').fetchone()[0] == 3
+    assert [row[0] for row in conn.execute('SELECT n FROM t ORDER BY n')] == list(range(5))
+    cursor = conn.execute('SELECT n FROM t')
+    while cursor.fetchmany(2):
+        pass
+    del cursor
+    assert len(observed) == 5
+    pool.close_all()
@@ -0,0 +1,45 @@
+import os
+import pytest
+from app.models.database import get_db
+from app.models.product import Product
+from app.models.upload import Upload
+from app.utils.images import image_sources, variant_name
+
+Image = pytest.importorskip('PIL.Image')
+
+@pytest.fixture
+def static_folder(app, tmp_path):
+    app.static_folder = str(tmp_path / 'static')
+    os.makedirs(os.path.join(app.static_folder, 'uploads'))
+    return app.static_folder
+
+def test_backfill_generates_and_records_legacy_variants(app, seller_id, static_folder):
+    Image.new('RGB', (640, 480), 'red').save(os.path.join(static_folder, 'uploads', 'legacy.jpg'))
+    with app.app_context():
+        product = Product(name='Legacy', price=5.0, image_path='uploads/legacy.jpg', seller_id=seller_id).save()
+        with app.test_request_context():
+            assert image_sources(product) is None
+
+    result = app.test_cli_runner().invoke(args=['images', 'backfill'])
+    assert result.exit_code == 0, result.output
+    assert 'Recorded derivatives of 1 image(s).' in result.output
+    assert os.path.exists(os.path.join(static_folder, variant_name('uploads/legacy.jpg', 'card', 'webp')))
+
+    with app.app_context():
+        product = Product.get_by_id(product.id, validate=True)
+        assert product.image_variants == 1
+        with app.test_request_context():
+            assert 'legacy.thumb.webp 160w' in image_sources(product)['webp']
+    result = app.test_cli_runner().invoke(args=['images', 'backfill'])
+    assert 'Recorded derivatives of 0 image(s).' in result.output
+
+def test_new_product_copies_the_flag_from_its_upload(app, seller_id):
+    with app.app_context():
+        Upload.acquire('uploads/shared.jpg', 'f' * 64, 10, lambda: None)
+        Upload.mark_variants_ready('uploads/shared.jpg')
+        product = Product(name='Shared', price=5.0, image_path='uploads/shared.jpg', seller_id=seller_id).save()
+        assert product.image_variants == 1
+        product.image_path = 'uploads/other.jpg'
+        product.save()
+        assert product.image_variants == 0
+        assert get_db().execute('SELECT image_variants FROM products WHERE id = ?', (product.id,)).fetchone()[0] == 0
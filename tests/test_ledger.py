@@ -0,0 +1,64 @@
+from app.models.ledger import OrderLedger
+from app.models.transaction import Transaction
+from app.utils.webhooks import parse_event
+
+def _event(reference, status):
+    return {'reference': reference, 'status': status, 'amount': 2400, 'currency': 'NGN', 'email': 'b@example.com',
+            'product_id': None, 'buyer_id': None, 'event': f'charge.{status}', 'paid_at': None}
+
+def _place(app, seller_id, products, reference='ref-1'):
+    with app.app_context():
+        Transaction.record_pending(reference, 2400, 'b@example.com', items=[
+            {'product_id': products[0], 'seller_id': seller_id, 'name': 'Widget 0', 'quantity': 2, 'unit_price': 12.0}
+        ])
+
+def test_reversal_is_netted_out_of_sales_totals(app, seller_id, products):
+    _place(app, seller_id, products)
+    with app.app_context():
+        Transaction.record_events([_event('ref-1', 'success')])
+        assert OrderLedger.get_sales_totals(seller_id) == {'lines': 1, 'units': 2, 'revenue': 2400}
+
+        Transaction.record_events([_event('ref-1', 'reversed')])
+        assert Transaction.get_by_reference('ref-1')['status'] == 'reversed'
+        assert OrderLedger.get_sales_totals(seller_id) == {'lines': 0, 'units': 0, 'revenue': 0}
+        assert OrderLedger.get_sales(seller_id, 10) == ([], None)
+
+def test_reversed_transaction_stays_reversed(app, seller_id, products):
+    _place(app, seller_id, products)
+    with app.app_context():
+        Transaction.record_events([_event('ref-1', 'success')])
+        Transaction.record_events([_event('ref-1', 'reversed')])
+        Transaction.record_events([_event('ref-1', 'success'), _event('ref-1', 'failed')])
+        assert Transaction.get_by_reference('ref-1')['status'] == 'reversed'
+        assert OrderLedger.get_sales_totals(seller_id)['revenue'] == 0
+
+def _refund(amount):
+    return parse_event({'event': 'refund.processed',
+                        'data': {'transaction_reference': 'ref-1', 'status': 'processed', 'amount': amount}})
+
+def test_early_reversal_is_dropped(app, seller_id, products):
+    _place(app, seller_id, products)
+    with app.app_context():
+        Transaction.record_events([_event('ref-1', 'reversed'), _refund(2400)])
+        assert Transaction.get_by_reference('ref-1')['status'] == 'pending'
+        Transaction.record_events([_event('ref-1', 'success')])
+        assert OrderLedger.get_sales_totals(seller_id) == {'lines': 1, 'units': 2, 'revenue': 2400}
+        assert len(OrderLedger.get_sales(seller_id, 10)[0]) == 1
+
+def test_partial_refund_keeps_the_sale(app, seller_id, products):
+    _place(app, seller_id, products)
+    with app.app_context():
+        Transaction.record_events([_event('ref-1', 'success')])
+        Transaction.record_events([_refund(1200)])
+        assert Transaction.get_by_reference('ref-1')['status'] == 'success'
+        assert OrderLedger.get_sales_totals(seller_id)['revenue'] == 2400
+
+def test_refund_event_reverses_its_charge(app, seller_id, products):
+    _place(app, seller_id, products)
+    refund = _refund(2400)
+    with app.app_context():
+        Transaction.record_events([_event('ref-1', 'success')])
+        Transaction.record_events([refund])
+        transaction = Transaction.get_by_reference('ref-1')
+        assert (transaction['status'], transaction['amount']) == ('reversed', 2400)
+        assert OrderLedger.get_sales_totals(seller_id)['revenue'] == 0
@@ -0,0 +1,9 @@
+def test_links_respect_the_script_root(client, seller_id, products):
+    with client.session_transaction() as session:
+        session['user_id'] = seller_id
+    response = client.get('/manage-products?limit=4', base_url='http://localhost/shop/')
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert 'href="/shop/manage-products?cursor=' in page
+    assert f'/shop/edit-product/{products[-1]}' in page
+    assert 'href="/manage-products' not in page and 'href="/add-product' not in page
@@ -0,0 +1,24 @@
+import pytest
+from app.utils.pagination import encode_cursor, decode_cursor
+
+# [[1],[2]]: decodes to a list of the right length, but not of scalars
+NESTED_CURSOR = 'W1sxXSxbMl1d'
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('2024-01-01 00:00:00', 42)
+    assert decode_cursor(cursor) == ('2024-01-01 00:00:00', 42)
+    assert decode_cursor(encode_cursor(-3.5, 7)) == (-3.5, 7)
+
+@pytest.mark.parametrize('values', [([1], [2]), (None, 1), (True, 1), ({'a': 1}, 1)])
+def test_decode_rejects_non_scalar_values(values):
+    assert decode_cursor(encode_cursor(*values)) is None
+
+def test_decode_rejects_garbage():
+    assert decode_cursor(NESTED_CURSOR) is None
+    assert decode_cursor('not base64!') is None
+    assert decode_cursor(encode_cursor(1, 2, 3)) is None
+
+def test_catalog_ignores_malformed_cursor(client, products):
+    response = client.get(f'/?cursor={NESTED_CURSOR}')
+    assert response.status_code == 200
+    assert b'Widget 9' in response.data
@@ -0,0 +1,15 @@
+import time
+import pytest
+from app.utils.passwords import PasswordHasher, HashingOverloaded
+
+def test_timed_out_hash_keeps_its_slot_until_it_finishes():
+    hasher = PasswordHasher('pbkdf2:sha256:1000', workers=1, max_pending=1, timeout=0.05)
+    with pytest.raises(HashingOverloaded):
+        hasher._run(time.sleep, 0.5)
+    # The sleep is still running in the pool, so its slot is still taken
+    assert not hasher._slots.acquire(blocking=False)
+    time.sleep(0.6)
+    assert hasher._slots.acquire(blocking=False)
+    hasher._slots.release()
+    hasher.timeout = 10
+    assert hasher.verify(hasher.hash('secret'), 'secret')
@@ -0,0 +1,88 @@
+import time
+import pytest
+from bench.paystack_stub import PaystackStub
+from app.models.database import get_db
+from app.models.payment_attempt import PaymentAttempt
+from app.utils.payment_utils import idempotency_key
+
+NONCE = 'retry-nonce-0123456789'
+
+@pytest.fixture
+def buyer(client, app):
+    with app.app_context():
+        db = get_db()
+        buyer_id = db.execute(
+            "INSERT INTO users (username, email, password_hash, user_type) VALUES ('buyer', 'b@example.com', 'x', 'buyer')"
+        ).lastrowid
+        db.commit()
+    with client.session_transaction() as session:
+        session['user_id'] = buyer_id
+    return buyer_id
+
+@pytest.fixture
+def paystack(app):
+    stub = PaystackStub()
+    stub.start()
+    app.config['PAYSTACK_BASE_URL'] = stub.url
+    yield stub
+    stub.stop()
+
+def _attempt(app, buyer, product_id):
+    with app.app_context():
+        return PaymentAttempt.get(idempotency_key(buyer, product_id, NONCE))
+
+def test_missing_email_does_not_claim(client, app, buyer, products):
+    response = client.post(f'/pay/{products[0]}', data={'nonce': NONCE})
+    assert response.status_code == 302
+    assert _attempt(app, buyer, products[0]) is None
+
+def test_failed_checkout_releases_claim_for_retry(client, app, buyer, products, paystack, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError('Paystack client blew up')
+    monkeypatch.setattr('app.routes.payments.initialize_payment', broken)
+    with pytest.raises(RuntimeError):
+        client.post(f'/pay/{products[0]}', data={'email': 'b@example.com', 'nonce': NONCE})
+    assert _attempt(app, buyer, products[0]) is None
+
+    monkeypatch.undo()
+    response = client.post(f'/pay/{products[0]}', data={'email': 'b@example.com', 'nonce': NONCE})
+    assert response.status_code == 302
+    assert response.location.startswith('https://checkout.paystack.test/')
+    assert _attempt(app, buyer, products[0])['status'] != 'pending'
+
+def test_duplicate_submit_gets_processing_page_instead_of_waiting(client, app, buyer, products):
+    with app.app_context():
+        key = idempotency_key(buyer, products[0], NONCE)
+        assert PaymentAttempt.claim(key, 60) == (True, None)
+    response = client.post(f'/pay/{products[0]}', data={'email': 'b@example.com', 'nonce': NONCE})
+    assert response.status_code == 200
+    assert b'http-equiv="refresh"' in response.data
+
+    with app.app_context():
+        PaymentAttempt.complete(key, 'ref-ready', 'https://checkout.paystack.test/ready', 1800)
+    response = client.get(f'/pay/attempts/{key}')
+    assert response.status_code == 302
+    assert response.location == 'https://checkout.paystack.test/ready'
+
+def test_abandoned_claim_frees_after_its_lease(client, app, buyer, products, paystack, monkeypatch):
+    app.config['PAY_CLAIM_LEASE'] = 0.2
+    # A worker killed mid-checkout never completes or releases its claim
+    def killed(*args, **kwargs):
+        raise RuntimeError('worker killed')
+    monkeypatch.setattr('app.routes.payments.initialize_payment', killed)
+    monkeypatch.setattr(PaymentAttempt, 'release', staticmethod(lambda key: None))
+    with pytest.raises(RuntimeError):
+        client.post(f'/pay/{products[0]}', data={'email': 'b@example.com', 'nonce': NONCE})
+    assert _attempt(app, buyer, products[0])['status'] == 'pending'
+
+    monkeypatch.undo()
+    time.sleep(0.3)
+    response = client.post(f'/pay/{products[0]}', data={'email': 'b@example.com', 'nonce': NONCE})
+    assert response.status_code == 302
+    attempt = _attempt(app, buyer, products[0])
+    assert attempt['status'] == 'ready'
+
+    # The authorization is kept for PAY_IDEMPOTENCY_TTL, not the lease
+    time.sleep(0.3)
+    response = client.post(f'/pay/{products[0]}', data={'email': 'b@example.com', 'nonce': NONCE})
+    assert response.location == attempt['auth_url']
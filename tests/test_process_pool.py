@@ -0,0 +1,26 @@
+import threading
+from app.utils.process_pool import LazyProcessPool
+
+_lock = threading.Lock()
+
+def _with_lock():
+    with _lock:
+        return True
+
+def test_pool_processes_do_not_inherit_held_locks():
+    pool = LazyProcessPool(1)
+    held, done = threading.Event(), threading.Event()
+
+    def holder():
+        with _lock:
+            held.set()
+            done.wait(10)
+    thread = threading.Thread(target=holder)
+    thread.start()
+    held.wait()
+    try:
+        # A forked child would start with _lock held and never finish
+        assert pool.submit(_with_lock).result(timeout=10)
+    finally:
+        done.set()
+        thread.join()
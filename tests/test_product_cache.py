@@ -0,0 +1,42 @@
+from app.models.database import get_db, get_pool
+from app.models.product import Product
+
+def _other_worker(app, sql, params):
+    """Write through a separate connection, as another worker would, without touching this identity map"""
+    with app.app_context():
+        db = get_db()
+        db.execute(sql, params)
+        db.commit()
+
+def test_cached_product_is_served_without_a_query(app, products):
+    with app.app_context():
+        product = Product.get_by_id(products[0])
+        statements = []
+        pool = get_pool()
+        observer, pool.observer = pool.observer, statements.append
+        try:
+            assert Product.get_by_id(products[0]) is product
+            assert Product.get_many([products[0]]) == {products[0]: product}
+        finally:
+            pool.observer = observer
+        assert statements == []
+
+def test_validated_read_sees_other_workers_price_change(app, products):
+    with app.app_context():
+        assert Product.get_by_id(products[0]).price == 10.0
+    _other_worker(app, 'UPDATE products SET price = ?, version = version + 1 WHERE id = ?', (99.0, products[0]))
+    with app.app_context():
+        # Plain reads may serve the cached copy until the TTL runs out
+        assert Product.get_by_id(products[0]).price == 10.0
+        assert Product.get_by_id(products[0], validate=True).price == 99.0
+        assert Product.get_many(products[:2], validate=True)[products[0]].price == 99.0
+        assert Product.get_by_id(products[0]).price == 99.0
+
+def test_validated_read_drops_product_deleted_by_other_worker(app, products):
+    with app.app_context():
+        assert set(Product.get_many(products[:3])) == set(products[:3])
+    _other_worker(app, 'DELETE FROM products WHERE id = ?', (products[1],))
+    with app.app_context():
+        assert Product.get_by_id(products[1], validate=True) is None
+        assert set(Product.get_many(products[:3], validate=True)) == {products[0], products[2]}
+        assert Product.get_by_id(products[1]) is None
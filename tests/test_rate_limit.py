@@ -0,0 +1,20 @@
+from app.utils.rate_limit import TokenBucketLimiter
+
+def test_refused_request_takes_no_token_from_any_bucket(tmp_path):
+    limiter = TokenBucketLimiter(str(tmp_path / 'buckets.db'))
+    assert limiter.take('user', 1, 0.01, now=0) == 0
+    # The user bucket is empty, so the ip token taken first is put back
+    assert limiter.take_all([('ip', 2, 0.01), ('user', 1, 0.01)], now=0) > 0
+    assert limiter.take_all([('ip', 2, 0.01)], now=0) == 0
+    assert limiter.take_all([('ip', 2, 0.01)], now=0) == 0
+    assert limiter.take_all([('ip', 2, 0.01)], now=0) > 0
+
+def _login(client, ip, password='wrong'):
+    return client.post('/login', data={'username': 'alice', 'password': password},
+                       environ_base={'REMOTE_ADDR': ip})
+
+def test_failed_logins_from_one_ip_do_not_lock_the_account_elsewhere(client):
+    for _ in range(5):
+        assert _login(client, '10.0.0.1').status_code == 200
+    assert _login(client, '10.0.0.1').status_code == 429
+    assert _login(client, '10.0.0.2').status_code == 200
@@ -0,0 +1,12 @@
+from app.utils.pagination import encode_cursor
+
+def test_search_finds_products(client, products):
+    response = client.get('/search?q=widget')
+    assert response.status_code == 200
+    assert b'Widget 0' in response.data
+
+def test_search_ignores_malformed_cursor(client, products):
+    for cursor in ('W1sxXSxbMl1d', encode_cursor(None, 1), 'garbage'):
+        response = client.get(f'/search?q=widget&cursor={cursor}')
+        assert response.status_code == 200
+        assert b'Widget' in response.data